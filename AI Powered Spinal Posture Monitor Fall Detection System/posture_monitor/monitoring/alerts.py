@@ -0,0 +1,238 @@
+import asyncio
+import random
+import time
+from datetime import timedelta
+from xml.sax.saxutils import escape
+
+import aiohttp
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import Histogram
+from .models import AlertOutbox, EmergencyAlert
+
+
+def fall_alert_message(username):
+    return f"EMERGENCY ALERT: Fall detected for user {username}. Please check on them immediately."
+
+
+@database_sync_to_async
+def enqueue_emergency_notifications(alert, phone_number, message):
+    """
+    Write the SMS and voice call for an EmergencyAlert to the outbox
+    Returns: number of new outbox rows (0 if the alert was already enqueued)
+    """
+    created = 0
+    with transaction.atomic():
+        for channel in ('sms', 'call'):
+            _, new = AlertOutbox.objects.get_or_create(
+                dedup_key=f"{alert.id}:{channel}",
+                defaults={'alert': alert, 'channel': channel, 'to_number': phone_number, 'body': message},
+            )
+            created += new
+    return created
+
+
+class AlertDispatcher:
+    """
+    Delivers AlertOutbox rows through the Twilio REST API.
+
+    A background task claims due rows, leasing them for lease_seconds so no
+    other dispatcher sends them too, and posts every claimed SMS and call
+    concurrently over one pooled aiohttp session. Network errors, 429 and 5xx
+    responses are retried with jittered exponential backoff up to
+    max_attempts; any other error response fails the row at once. Rows left
+    pending by a restart are picked up as soon as the dispatcher starts.
+    """
+
+    def __init__(self, api_base='https://api.twilio.com', account_sid='', auth_token='', from_number='',
+                 max_attempts=5, backoff_base=2.0, backoff_max=300.0, poll_interval=10.0,
+                 batch_size=20, max_connections=10, request_timeout=10.0, lease_seconds=60.0):
+        self.api_base = api_base.rstrip('/')
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_connections = max_connections
+        self.request_timeout = request_timeout
+        self.lease_seconds = lease_seconds
+        self._loop = None
+        self._task = None
+        self._session = None
+        self._wakeup = None
+        # Earliest retry scheduled by the last dispatch, so _run wakes up for it
+        self._next_retry = None
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.request_latency_histogram = Histogram((10, 50, 100, 250, 500, 1000, 2500, 5000, 10000))
+
+    def _ensure_started(self):
+        # The session, event and task belong to the running loop; restart them if it changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._session = None
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    def start(self):
+        """Start the background task (it delivers anything already due)"""
+        self._ensure_started()
+
+    def wake(self):
+        """Deliver newly enqueued rows now instead of at the next poll"""
+        self._ensure_started()
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.dispatch_due()
+            except Exception as e:
+                print(f"Error dispatching emergency alerts: {e}")
+
+            timeout = self.poll_interval
+            if self._next_retry is not None:
+                timeout = min(timeout, max(self._next_retry - time.monotonic(), 0.0))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.account_sid, self.auth_token),
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        return self._session
+
+    async def dispatch_due(self):
+        """
+        Send every outbox row that is due, in parallel
+        Returns: number of rows delivered
+        """
+        self._next_retry = None
+        entries = await self._claim()
+        if not entries:
+            return 0
+        results = await asyncio.gather(*(self._deliver(entry) for entry in entries))
+        return sum(results)
+
+    @database_sync_to_async
+    def _claim(self):
+        now = timezone.now()
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        claimed = []
+        due = AlertOutbox.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at')
+        for entry in due[:self.batch_size]:
+            # Conditional update, so only one dispatcher wins each row
+            leased = AlertOutbox.objects.filter(
+                pk=entry.pk, status='pending', next_attempt_at=entry.next_attempt_at
+            ).update(next_attempt_at=lease_until)
+            if leased:
+                claimed.append(entry)
+        return claimed
+
+    def _request(self, entry):
+        resource = 'Messages' if entry.channel == 'sms' else 'Calls'
+        url = f"{self.api_base}/2010-04-01/Accounts/{self.account_sid}/{resource}.json"
+        data = {'To': entry.to_number, 'From': self.from_number}
+        if entry.channel == 'sms':
+            data['Body'] = entry.body
+        else:
+            data['Twiml'] = f'<Response><Say>{escape(entry.body)}</Say></Response>'
+        return url, data
+
+    async def _deliver(self, entry):
+        url, data = self._request(entry)
+        started = time.perf_counter()
+        status = None
+        try:
+            async with self._get_session().post(url, data=data) as response:
+                status = response.status
+                result = await response.json(content_type=None)
+            error = '' if status < 300 else str(result.get('message', result) if isinstance(result, dict) else result)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            result = None
+            error = str(e) or type(e).__name__
+        self.request_latency_histogram.observe((time.perf_counter() - started) * 1000.0)
+
+        if status is not None and status < 300:
+            self.sent += 1
+            sid = result.get('sid', '') if isinstance(result, dict) else ''
+            await self._record(entry, 'sent', provider_sid=sid or '')
+            return 1
+
+        retryable = status is None or status == 429 or status >= 500
+        if retryable and entry.attempts + 1 < self.max_attempts:
+            self.retries += 1
+            delay = min(self.backoff_base * 2 ** entry.attempts, self.backoff_max) * random.uniform(0.5, 1.0)
+            retry_at = time.monotonic() + delay
+            self._next_retry = retry_at if self._next_retry is None else min(self._next_retry, retry_at)
+            await self._record(entry, 'pending', error=error, retry_in=delay)
+        else:
+            self.failed += 1
+            print(f"Error sending emergency {entry.channel} to {entry.to_number}: {error}")
+            await self._record(entry, 'failed', error=error)
+        return 0
+
+    @database_sync_to_async
+    def _record(self, entry, status, error='', provider_sid='', retry_in=None):
+        entry.attempts += 1
+        entry.status = status
+        entry.last_error = error
+        entry.provider_sid = provider_sid
+        fields = ['attempts', 'status', 'last_error', 'provider_sid']
+        if status == 'sent':
+            entry.sent_at = timezone.now()
+            fields.append('sent_at')
+        if retry_in is not None:
+            entry.next_attempt_at = timezone.now() + timedelta(seconds=retry_in)
+            fields.append('next_attempt_at')
+        entry.save(update_fields=fields)
+
+        if status == 'sent':
+            EmergencyAlert.objects.filter(pk=entry.alert_id).update(emergency_contact_notified=True)
+
+    async def close(self):
+        """Stop the background task and release pooled connections"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self):
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'request_latency_ms': self.request_latency_histogram.snapshot(),
+        }
+
+
+# Global dispatcher shared by every consumer in this process
+alert_dispatcher = AlertDispatcher(
+    api_base=getattr(settings, 'TWILIO_API_BASE', 'https://api.twilio.com'),
+    account_sid=settings.TWILIO_ACCOUNT_SID,
+    auth_token=settings.TWILIO_AUTH_TOKEN,
+    from_number=settings.TWILIO_PHONE_NUMBER,
+    max_attempts=getattr(settings, 'ALERT_DISPATCH_MAX_ATTEMPTS', 5),
+    backoff_base=getattr(settings, 'ALERT_DISPATCH_BACKOFF_BASE', 2.0),
+    backoff_max=getattr(settings, 'ALERT_DISPATCH_BACKOFF_MAX', 300.0),
+    poll_interval=getattr(settings, 'ALERT_DISPATCH_POLL_INTERVAL', 10.0),
+    max_connections=getattr(settings, 'ALERT_DISPATCH_MAX_CONNECTIONS', 10),
+    request_timeout=getattr(settings, 'ALERT_DISPATCH_REQUEST_TIMEOUT', 10.0),
+)
@@ -0,0 +1,193 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .compiled_trees import compile_estimator
+from .lookup_grid import PostureLookupGrid
+from .process_pool import PooledModel, ProcessPoolInference
+from .registry import ModelBundle
+
+
+class InferenceBackend:
+    """
+    Strategy for evaluating the fitted estimators of a ModelBundle.
+
+    prepare() replaces bundle.posture_model / bundle.fall_model (and may set
+    bundle.posture_grid or bundle.process_pool) with evaluators that expose
+    classes_, n_features_in_ and predict_proba like the sklearn estimators.
+    """
+
+    name = None
+
+    def prepare(self, bundle, paths):
+        raise NotImplementedError
+
+
+class SklearnBackend(InferenceBackend):
+    """Evaluate the unpickled sklearn estimators as they are"""
+
+    name = 'sklearn'
+
+    def prepare(self, bundle, paths):
+        pass
+
+
+class CompiledBackend(InferenceBackend):
+    """Flatten tree ensembles into NumPy node tables"""
+
+    name = 'compiled'
+
+    def prepare(self, bundle, paths):
+        if bundle.posture_model is not None:
+            bundle.posture_model = compile_estimator(bundle.posture_model) or bundle.posture_model
+        if bundle.fall_model is not None:
+            bundle.fall_model = compile_estimator(bundle.fall_model) or bundle.fall_model
+
+
+class GridBackend(CompiledBackend):
+    """Compiled trees plus the precomputed tilt lookup grid for real-time posture calls"""
+
+    name = 'grid'
+
+    def prepare(self, bundle, paths):
+        super().prepare(bundle, paths)
+        build_posture_grid(bundle)
+
+
+class ProcessPoolBackend(InferenceBackend):
+    """Evaluate models in worker processes fed through shared memory"""
+
+    name = 'process_pool'
+
+    def prepare(self, bundle, paths):
+        try:
+            bundle.process_pool = ProcessPoolInference(
+                paths,
+                workers=getattr(settings, 'ML_PROCESS_POOL_WORKERS', 2),
+                slots=getattr(settings, 'ML_PROCESS_POOL_SLOTS', 16),
+                slot_rows=getattr(settings, 'ML_PROCESS_POOL_SLOT_ROWS', 4096),
+            )
+        except Exception as e:
+            print(f"Error starting inference process pool, using in-process models: {e}")
+            return
+
+        # Keep the in-process copy only if a worker could not load the model
+        if 'posture' in bundle.process_pool.models:
+            bundle.posture_model = PooledModel(bundle.process_pool, 'posture')
+        if 'fall' in bundle.process_pool.models:
+            bundle.fall_model = PooledModel(bundle.process_pool, 'fall')
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (SklearnBackend(), CompiledBackend(), GridBackend(), ProcessPoolBackend())
+}
+
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"Unknown ML_INFERENCE_BACKEND {name!r}; choose one of {sorted(BACKENDS)} or 'auto'"
+        )
+    return BACKENDS[name]
+
+
+def build_posture_grid(bundle):
+    """Precompute the quantized tilt lookup grid for the bundle's posture model"""
+    if bundle.posture_model is None:
+        return
+
+    try:
+        bundle.posture_grid = PostureLookupGrid(
+            bundle.posture_model,
+            tilt_range=getattr(settings, 'POSTURE_GRID_RANGE', (-90.0, 90.0)),
+            resolution=getattr(settings, 'POSTURE_GRID_RESOLUTION', 0.5),
+        )
+    except Exception as e:
+        print(f"Error building posture lookup grid: {e}")
+
+
+def _reference(model, X):
+    probability = model.predict_proba(X)
+    return model.classes_.take(np.argmax(probability, axis=1)), probability.max(axis=1)
+
+
+def _matches(candidate, evaluate_posture, validation):
+    """True if the candidate reproduces the sklearn labels and confidences"""
+    if 'posture' in validation:
+        X, (labels, confidences) = validation['posture']
+        for (tilt_x, tilt_y), label, confidence in zip(X.tolist(), labels.tolist(), confidences.tolist()):
+            result = evaluate_posture(candidate, tilt_x, tilt_y)
+            if result is None or result['is_correct'] != bool(label) or abs(result['confidence'] - confidence) > 1e-9:
+                return False
+    if 'fall' in validation:
+        X, (labels, confidences) = validation['fall']
+        candidate_labels, candidate_confidences = _reference(candidate.fall_model, X)
+        if not (np.array_equal(candidate_labels, labels) and np.allclose(candidate_confidences, confidences)):
+            return False
+    return True
+
+
+def _time_per_call(candidate, evaluate_posture, validation, calls):
+    """Mean microseconds of one real-time posture call plus one fall call"""
+    elapsed = 0.0
+    if 'posture' in validation:
+        rows = validation['posture'][0][:calls].tolist()
+        started = time.perf_counter()
+        for tilt_x, tilt_y in rows:
+            evaluate_posture(candidate, tilt_x, tilt_y)
+        elapsed += (time.perf_counter() - started) / len(rows)
+    if 'fall' in validation:
+        rows = validation['fall'][0][:calls]
+        started = time.perf_counter()
+        for row in rows:
+            candidate.fall_model.predict_proba(row[np.newaxis, :])
+        elapsed += (time.perf_counter() - started) / len(rows)
+    return elapsed * 1e6
+
+
+def select_backend(bundle, paths, evaluate_posture, candidates, validation_size=256, timing_calls=50):
+    """
+    Prepare every candidate backend on its own copy of bundle, check it against
+    the plain sklearn estimators on a validation sample and keep the fastest
+    one that matches. sklearn is the reference and always qualifies.
+    Returns: the prepared bundle, with backend and backend_report set
+    Raises: RuntimeError if no candidate, not even sklearn, could be prepared
+    """
+    rng = np.random.default_rng(0)
+    validation = {}
+    for kind, model in (('posture', bundle.posture_model), ('fall', bundle.fall_model)):
+        if model is not None:
+            X = rng.uniform(-90, 90, size=(validation_size, model.n_features_in_))
+            validation[kind] = (X, _reference(model, X))
+
+    report = {}
+    best = None
+    for name in dict.fromkeys(('sklearn',) + tuple(candidates)):
+        candidate = ModelBundle(bundle.files, posture_model=bundle.posture_model, fall_model=bundle.fall_model)
+        try:
+            get_backend(name).prepare(candidate, paths)
+            matches = name == 'sklearn' or _matches(candidate, evaluate_posture, validation)
+            us_per_call = _time_per_call(candidate, evaluate_posture, validation, timing_calls)
+        except Exception as e:
+            print(f"Error evaluating inference backend {name}: {e}")
+            candidate.close()
+            report[name] = {'error': str(e)}
+            continue
+
+        report[name] = {'matches_reference': matches, 'us_per_call': us_per_call}
+        if matches and (best is None or us_per_call < report[best[0]]['us_per_call']):
+            if best is not None:
+                best[1].close()
+            best = (name, candidate)
+        else:
+            candidate.close()
+
+    if best is None:
+        raise RuntimeError(f"No inference backend could serve these models: {report}")
+    name, chosen = best
+    chosen.backend = name
+    chosen.backend_report = report
+    return chosen
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .executor import DEFAULT as DEFAULT_TIMEOUT, inference_executor
+from .metrics import Histogram
+from .ml_models import posture_analyzer
+
+
+class InferenceBatcher:
+    """
+    Process-wide micro-batching scheduler for real-time inference.
+
+    Consumers await predict_posture / predict_fall; pending requests from every
+    connection are collected per model and flushed as one vectorized call when
+    max_batch_size requests are queued or the oldest has waited max_wait_ms.
+    The model call runs on the bounded inference executor so the event loop
+    keeps serving websocket I/O while a batch is evaluated.
+    """
+
+    def __init__(self, analyzer, max_batch_size=64, max_wait_ms=5.0):
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = {'posture': [], 'fall': []}
+        self._timers = {}
+        self._predictors = {
+            'posture': analyzer.predict_posture_batch,
+            'fall': analyzer.predict_fall_batch,
+        }
+        self.batch_size_histogram = Histogram((1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+        self.queue_wait_histogram = Histogram((0.5, 1, 2, 5, 10, 20, 50, 100))
+
+    async def predict_posture(self, tilt_x, tilt_y):
+        return await self._submit('posture', (tilt_x, tilt_y))
+
+    async def predict_fall(self, gyro_x, gyro_y, gyro_z):
+        return await self._submit('fall', (gyro_x, gyro_y, gyro_z))
+
+    async def _submit(self, kind, row):
+        try:
+            row = tuple(float(value) for value in row)
+        except (TypeError, ValueError) as e:
+            print(f"Error queueing {kind} prediction: {e}")
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending[kind]
+        pending.append((row, future, time.perf_counter()))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(kind)
+        elif kind not in self._timers:
+            self._timers[kind] = loop.call_later(self.max_wait, self._flush, kind)
+
+        return await future
+
+    def _flush(self, kind):
+        timer = self._timers.pop(kind, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending[kind]
+        self._pending[kind] = []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(kind, batch))
+
+    async def _run_batch(self, kind, batch):
+        started = time.perf_counter()
+        self.batch_size_histogram.observe(len(batch))
+        for _, _, queued_at in batch:
+            self.queue_wait_histogram.observe((started - queued_at) * 1000.0)
+
+        features = np.array([row for row, _, _ in batch], dtype=np.float64)
+        # The executor reports failures and timeouts itself and returns None;
+        # fall batches always wait for their result
+        timeout = None if kind == 'fall' else DEFAULT_TIMEOUT
+        results = await inference_executor.run(self._predictors[kind], features, timeout=timeout)
+        if results is None:
+            results = [None] * len(batch)
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'queue_wait_ms': self.queue_wait_histogram.snapshot(),
+        }
+
+
+# Global scheduler shared by every consumer in this process
+inference_batcher = InferenceBatcher(
+    posture_analyzer,
+    max_batch_size=getattr(settings, 'ML_BATCH_MAX_SIZE', 64),
+    max_wait_ms=getattr(settings, 'ML_BATCH_MAX_WAIT_MS', 5.0),
+)
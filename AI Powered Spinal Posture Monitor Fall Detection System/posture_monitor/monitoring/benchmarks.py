@@ -0,0 +1,200 @@
+import os
+import platform
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+from django.conf import settings
+
+from .registry import MODEL_FILES, scan_model_files
+
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# Number of input features each model kind expects
+MODEL_FEATURES = {'posture': 2, 'fall': 3}
+
+
+def synthetic_model(n_features, seed=0):
+    """Random forest shaped like the shipped posture model, trained on synthetic tilt/gyro data"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(-90, 90, size=(5000, n_features))
+    y = (X.sum(axis=1) + rng.normal(0, 10, size=len(X)) > 0).astype(int)
+    return RandomForestClassifier(n_estimators=100, max_depth=5, min_samples_split=5, random_state=seed).fit(X, y)
+
+
+def prepare_models_dir(force_synthetic=False):
+    """
+    Build a temporary ML_MODELS_DIR holding the shipped models plus synthetic
+    stand-ins for any that are missing
+    Returns: (directory, list of synthetic model kinds)
+    """
+    directory = tempfile.mkdtemp(prefix='posture-bench-')
+    shipped = {} if force_synthetic else scan_model_files(settings.ML_MODELS_DIR)
+    synthetic = []
+
+    for seed, (kind, base) in enumerate(MODEL_FILES.items()):
+        if kind in shipped:
+            source = shipped[kind][1]
+            shutil.copyfile(source, os.path.join(directory, base + os.path.splitext(source)[1]))
+        else:
+            joblib.dump(synthetic_model(MODEL_FEATURES[kind], seed), os.path.join(directory, f'{base}.pkl'))
+            synthetic.append(kind)
+
+    return directory, synthetic
+
+
+@contextmanager
+def swapped_settings(**values):
+    """Temporarily set Django settings, restoring (or removing) them afterwards"""
+    missing = object()
+    previous = {name: getattr(settings, name, missing) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is missing:
+                delattr(settings, name)
+            else:
+                setattr(settings, name, value)
+
+
+class Timer:
+    """Best-of-repeat wall-clock timing with a per-measurement time budget"""
+
+    def __init__(self, repeat, budget, max_calls):
+        self.repeat = repeat
+        self.budget = budget
+        self.max_calls = max_calls
+
+    def best_of(self, function):
+        best = float('inf')
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+
+def _per_call(predict, rows):
+    def run():
+        for row in rows:
+            predict(*row)
+    return run
+
+
+def benchmark_analyzer(name, analyzer, batch_sizes, timer, seed=0):
+    """Time predict_posture, predict_fall and analyze_batch_data (plus batch APIs when present)"""
+    rng = np.random.default_rng(seed)
+    results = []
+    # Seconds per row of the previous size, used to skip sizes that would blow the budget
+    per_row_estimate = {}
+
+    operations = [
+        ('predict_posture', 2, lambda X: _per_call(analyzer.predict_posture, X.tolist()), True),
+        ('predict_fall', 3, lambda X: _per_call(analyzer.predict_fall, X.tolist()), True),
+        ('analyze_batch_data', 2, lambda X: lambda: analyzer.analyze_batch_data(
+            [{'tilt_x': tilt_x, 'tilt_y': tilt_y} for tilt_x, tilt_y in X.tolist()]), False),
+    ]
+    if hasattr(analyzer, 'predict_posture_batch'):
+        operations.append(('predict_posture_batch', 2, lambda X: lambda: analyzer.predict_posture_batch(X), False))
+    if hasattr(analyzer, 'predict_fall_batch'):
+        operations.append(('predict_fall_batch', 3, lambda X: lambda: analyzer.predict_fall_batch(X), False))
+
+    for operation, n_features, build, per_call in operations:
+        for batch_size in batch_sizes:
+            entry = {'analyzer': name, 'operation': operation, 'batch_size': batch_size}
+            # Per-call APIs are timed on at most max_calls rows and scaled up
+            timed_rows = min(batch_size, timer.max_calls) if per_call else batch_size
+
+            estimate = per_row_estimate.get(operation)
+            if estimate is not None and estimate * timed_rows * timer.repeat > timer.budget:
+                entry['skipped'] = f'estimated {estimate * timed_rows * timer.repeat:.1f}s exceeds budget'
+                results.append(entry)
+                continue
+
+            X = rng.uniform(-90, 90, size=(timed_rows, n_features))
+            seconds = timer.best_of(build(X)) * batch_size / timed_rows
+            per_row_estimate[operation] = seconds / batch_size
+            entry.update({
+                'seconds': seconds,
+                'per_sample_us': seconds / batch_size * 1e6,
+                'samples_per_second': batch_size / seconds if seconds else None,
+                'timed_rows': timed_rows,
+                'repeat': timer.repeat,
+            })
+            results.append(entry)
+
+    return results
+
+
+def run_benchmarks(batch_sizes=DEFAULT_BATCH_SIZES, repeat=3, budget=30.0, max_calls=1000,
+                   force_synthetic=False, backend=None):
+    """Benchmark PostureAnalyzer and SimplePostureAnalyzer; returns a JSON-serializable report"""
+    from sklearn import __version__ as sklearn_version
+
+    from .ml_models import PostureAnalyzer, SimplePostureAnalyzer
+
+    backend = backend or getattr(settings, 'ML_INFERENCE_BACKEND', 'sklearn')
+    models_dir, synthetic = prepare_models_dir(force_synthetic)
+    timer = Timer(repeat, budget, max_calls)
+    try:
+        with swapped_settings(ML_MODELS_DIR=models_dir, ML_MODEL_RELOAD_INTERVAL=0, ML_INFERENCE_BACKEND=backend):
+            analyzers = {
+                'PostureAnalyzer': PostureAnalyzer(lazy=False),
+                'SimplePostureAnalyzer': SimplePostureAnalyzer(),
+            }
+            results = []
+            for name, analyzer in analyzers.items():
+                results.extend(benchmark_analyzer(name, analyzer, batch_sizes, timer))
+    finally:
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn_version,
+            'machine': platform.machine(),
+            'backend': backend,
+            'synthetic_models': synthetic,
+        },
+        'results': results,
+    }
+
+
+def compare_reports(previous, current, tolerance=0.25):
+    """
+    Match the measurements of two run_benchmarks() reports by analyzer,
+    operation and batch size
+    Returns: list of regressions, each measurement more than tolerance
+    (a fraction) slower than in previous
+    """
+    def measured(report):
+        return {
+            (entry['analyzer'], entry['operation'], entry['batch_size']): entry['seconds']
+            for entry in report['results'] if 'seconds' in entry
+        }
+
+    before = measured(previous)
+    regressions = []
+    for key, seconds in measured(current).items():
+        baseline = before.get(key)
+        if baseline and seconds > baseline * (1.0 + tolerance):
+            analyzer, operation, batch_size = key
+            regressions.append({
+                'analyzer': analyzer,
+                'operation': operation,
+                'batch_size': batch_size,
+                'previous_seconds': baseline,
+                'seconds': seconds,
+                'slowdown': seconds / baseline,
+            })
+    return regressions
@@ -0,0 +1,157 @@
+import math
+import threading
+
+import numpy as np
+
+# Added to the diagonal of every baseline covariance (degrees squared) so a very
+# still calibration window cannot produce a near-singular matrix
+MIN_VARIANCE = 0.25
+
+
+class BaselineStats:
+    """Process-wide counters for every BaselineClassifier"""
+
+    def __init__(self):
+        self.answered = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    def record(self, answered):
+        with self._lock:
+            if answered:
+                self.answered += 1
+            else:
+                self.escalated += 1
+
+    def record_many(self, answered, escalated):
+        with self._lock:
+            self.answered += answered
+            self.escalated += escalated
+
+    def snapshot(self):
+        total = self.answered + self.escalated
+        return {
+            'answered': self.answered,
+            'escalated': self.escalated,
+            'answered_fraction': self.answered / total if total else 0.0,
+        }
+
+
+baseline_stats = BaselineStats()
+
+
+class CalibrationWindow:
+    """Collects (tilt_x, tilt_y) samples while the user holds their upright posture"""
+
+    def __init__(self, size=50):
+        self.size = size
+        self._samples = np.empty((size, 2), dtype=np.float64)
+        self._count = 0
+
+    @property
+    def is_full(self):
+        return self._count >= self.size
+
+    def add(self, tilt_x, tilt_y):
+        """Add one sample; returns True once the window is full"""
+        if not self.is_full:
+            self._samples[self._count] = (float(tilt_x), float(tilt_y))
+            self._count += 1
+        return self.is_full
+
+    def baseline(self):
+        """
+        Mean and covariance of the collected samples
+        Returns: (mean, covariance) as plain lists, ready for UserProfile
+        """
+        samples = self._samples[:self._count]
+        mean = samples.mean(axis=0)
+        covariance = np.cov(samples, rowvar=False) + MIN_VARIANCE * np.eye(2)
+        return mean.tolist(), covariance.tolist()
+
+
+class BaselineClassifier:
+    """
+    Per-user posture fast path around a calibrated upright baseline.
+
+    Samples within inner_radius (Mahalanobis distance) of the baseline are
+    correct; everything else is left to the model. The covariance only
+    measures sensor noise while the user sits still, so the ellipse says
+    nothing about where the model's incorrect region starts: callers must
+    check probe_points() against the model before trusting the classifier.
+    """
+
+    def __init__(self, mean, covariance, inner_radius=2.0, stats=baseline_stats):
+        if not inner_radius > 0:
+            raise ValueError("inner_radius must be positive")
+        self.mean_x, self.mean_y = (float(value) for value in mean)
+        self.covariance = np.asarray(covariance, dtype=np.float64)
+        # Precision matrix entries, so classify() is a handful of float operations
+        (self.a, self.b), (_, self.c) = np.linalg.inv(self.covariance).tolist()
+        self.inner_radius = inner_radius
+        self.inner_sq = inner_radius * inner_radius
+        self.stats = stats
+
+    @classmethod
+    def from_profile(cls, profile, **options):
+        """Classifier for a calibrated UserProfile, or None if it has no usable baseline"""
+        if not profile.posture_baseline_mean or not profile.posture_baseline_covariance:
+            return None
+        try:
+            return cls(profile.posture_baseline_mean, profile.posture_baseline_covariance, **options)
+        except (ValueError, TypeError, np.linalg.LinAlgError) as e:
+            print(f"Error loading posture baseline for {profile.user_id}: {e}")
+            return None
+
+    def distance(self, tilt_x, tilt_y):
+        dx = float(tilt_x) - self.mean_x
+        dy = float(tilt_y) - self.mean_y
+        return math.sqrt(max(dx * (self.a * dx + self.b * dy) + dy * (self.b * dx + self.c * dy), 0.0))
+
+    def probe_points(self, rings=(0.5, 1.0), count=16):
+        """
+        The mean plus count points on each ring (fractions of inner_radius) of
+        the inner ellipse, for checking the answered region against the model
+        Returns: (1 + len(rings) * count, 2) array of (tilt_x, tilt_y) rows
+        """
+        angles = np.linspace(0.0, 2.0 * np.pi, count, endpoint=False)
+        circle = np.stack([np.cos(angles), np.sin(angles)])
+        # Maps the unit circle onto the Mahalanobis distance-1 ellipse
+        ellipse = (np.linalg.cholesky(self.covariance) @ circle).T
+        points = [np.array([[self.mean_x, self.mean_y]])]
+        for ring in rings:
+            points.append((self.mean_x, self.mean_y) + ellipse * (ring * self.inner_radius))
+        return np.vstack(points)
+
+    def classify(self, tilt_x, tilt_y):
+        """
+        Classify a sample against the baseline
+        Returns: result dict like predict_posture (confidence None, plus the
+        distance), or None when the sample needs the model
+        """
+        distance = self.distance(tilt_x, tilt_y)
+        result = None
+        if distance * distance <= self.inner_sq:
+            result = {'is_correct': True, 'confidence': None, 'distance': distance}
+
+        if self.stats is not None:
+            self.stats.record(result is not None)
+        return result
+
+    def classify_many(self, tilts):
+        """
+        Vectorized classify() over an (n, 2) array of (tilt_x, tilt_y) rows
+        Returns: (is_correct, answered) boolean arrays; is_correct is only
+        meaningful where answered is True
+        """
+        tilts = np.asarray(tilts, dtype=np.float64)
+        dx = tilts[:, 0] - self.mean_x
+        dy = tilts[:, 1] - self.mean_y
+        distance_sq = dx * (self.a * dx + self.b * dy) + dy * (self.b * dx + self.c * dy)
+
+        answered = distance_sq <= self.inner_sq
+        is_correct = answered.copy()
+        if self.stats is not None:
+            answered_count = int(answered.sum())
+            self.stats.record_many(answered_count, len(answered) - answered_count)
+        return is_correct, answered
@@ -0,0 +1,163 @@
+import numpy as np
+
+# Bumped whenever the array layout written by CompiledForest.save() changes
+FORMAT_VERSION = 1
+
+
+class CompiledForest:
+    """
+    Fitted decision tree / random forest classifier flattened into array-backed
+    node tables (feature, threshold, left, right, value).
+
+    Exposes classes_, predict and predict_proba so it can stand in for the
+    sklearn estimator it was built from, without sklearn's per-call input
+    validation and dispatch.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, n_features_in):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.metadata = {}
+
+    @classmethod
+    def from_estimator(cls, estimator):
+        """Flatten a fitted DecisionTreeClassifier or RandomForestClassifier"""
+        trees = getattr(estimator, 'estimators_', None)
+        if trees is None:
+            trees = [estimator]
+        if not all(hasattr(tree, 'tree_') for tree in trees):
+            raise ValueError(f"Cannot compile {type(estimator).__name__}: not a tree classifier")
+        if getattr(estimator, 'n_outputs_', 1) != 1:
+            raise ValueError("Cannot compile multi-output tree classifiers")
+
+        n_classes = len(estimator.classes_)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for tree in trees:
+            tree_ = tree.tree_
+            node_ids = np.arange(tree_.node_count)
+            is_leaf = tree_.children_left == -1
+
+            # Leaves point at themselves so a fixed number of steps is stable
+            left = np.where(is_leaf, node_ids, tree_.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree_.children_right) + offset
+            feature = np.where(is_leaf, 0, tree_.feature)
+            threshold = np.where(is_leaf, 0.0, tree_.threshold)
+
+            # Same normalization DecisionTreeClassifier.predict_proba applies
+            value = tree_.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value / normalizer)
+            roots.append(offset)
+            max_depth = max(max_depth, tree_.max_depth)
+            offset += tree_.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=np.asarray(estimator.classes_),
+            n_features_in=int(estimator.n_features_in_),
+        )
+
+    def save(self, file, **metadata):
+        """
+        Write the node tables to an uncompressed .npz archive that load() reads
+        back without pickle or sklearn; metadata values are stored as strings
+        """
+        classes = self.classes_
+        if classes.dtype == object:
+            classes = classes.astype(str)
+        np.savez(
+            file,
+            format_version=np.int32(FORMAT_VERSION),
+            feature=self.feature.astype(np.int32),
+            threshold=self.threshold,
+            left=self.left.astype(np.int32),
+            right=self.right.astype(np.int32),
+            value=self.value,
+            roots=self.roots.astype(np.int32),
+            max_depth=np.int32(self.max_depth),
+            classes=classes,
+            n_features_in=np.int32(self.n_features_in_),
+            **{f'meta_{key}': np.str_(value) for key, value in metadata.items()},
+        )
+
+    @classmethod
+    def load(cls, file):
+        """Read a forest written by save()"""
+        with np.load(file, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported model format version {int(data['format_version'])}")
+            forest = cls(
+                feature=data['feature'].astype(np.intp),
+                threshold=data['threshold'],
+                left=data['left'].astype(np.intp),
+                right=data['right'].astype(np.intp),
+                value=data['value'],
+                roots=data['roots'].astype(np.intp),
+                max_depth=int(data['max_depth']),
+                classes=data['classes'],
+                n_features_in=int(data['n_features_in']),
+            )
+            forest.metadata = {key[5:]: str(data[key]) for key in data.files if key.startswith('meta_')}
+        return forest
+
+    def _validate(self, X):
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n, {self.n_features_in_}), got {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+        return X
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_samples, n_trees)"""
+        X = self._validate(X)
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], len(X), axis=0)
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        # Summing over the tree axis adds trees in order, like the sklearn forest
+        return self.value[leaves].sum(axis=1) / len(self.roots)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def compile_estimator(estimator):
+    """Compile a fitted tree classifier, or return None if it is not supported"""
+    if isinstance(estimator, CompiledForest):
+        return estimator
+    try:
+        return CompiledForest.from_estimator(estimator)
+    except (AttributeError, ValueError) as e:
+        print(f"Could not compile model, using sklearn: {e}")
+        return None
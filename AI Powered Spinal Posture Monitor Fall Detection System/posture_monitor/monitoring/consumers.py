@@ -1,31 +1,111 @@
 import json
 import asyncio
+import time
+import numpy as np
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import User
-from .models import PostureData, PostureSession, EmergencyAlert, UserProfile
-from .ml_models import posture_analyzer
-from .utils import send_emergency_call, send_vibration_signal
-from datetime import datetime, timedelta
+from .models import PostureSession, EmergencyAlert, UserProfile
+from .ml_models import (
+    FALL_COLUMNS, POSTURE_COLUMNS, SENSOR_CHANNELS, SampleAnalysis, posture_analyzer, sensor_matrix, sensor_row,
+)
+from .alerts import alert_dispatcher, enqueue_emergency_notifications, fall_alert_message
+from .batching import inference_batcher
+from .calibration import BaselineClassifier, CalibrationWindow
+from .executor import DEFAULT as DEFAULT_TIMEOUT, inference_executor
+from .fall_gate import FallGate
+from .features import FallFeatureWindow
+from .incidents import FallIncidentTracker
+from .persistence import PostureWriteBuffer, bulk_create_posture_data, ingestion_writer
+from .posture_window import PostureWindow
+from .profiles import PROFILE_CHANGED, ProfileSnapshot, profile_group
+from .protocol import FrameError, decode_frame
+from .throttle import UpdateThrottle
+from .utils import send_vibration_signal
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
 from django.utils import timezone
 
+# fall_alert message for each EmergencyAlert.suppression_reason
+FALL_ALERT_MESSAGES = {
+    '': 'Fall detected! Emergency services contacted.',
+    'cooldown': 'Fall detected! Emergency contact was already notified of a recent fall.',
+    'no_contact': 'Fall detected! No emergency contact is set up to notify.',
+}
+
 class PostureConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.user = None
+        # ProfileSnapshot loaded at device_connect and replaced on profile.changed
+        self.profile = None
         self.device_id = None
-        self.posture_history = []
+        self.last_sequence = None
+        self.update_throttle = UpdateThrottle(rate_hz=getattr(settings, 'POSTURE_UPDATE_RATE_HZ', 10.0))
+        self.update_timer = None
+        self.update_task = None
+        self.frames_lost = 0
+        # Last 5 minutes of posture outcomes, with room for the fastest devices
+        self.posture_history = PostureWindow.for_rate(
+            duration=300.0, max_rate_hz=getattr(settings, 'POSTURE_MAX_SAMPLE_RATE_HZ', 100.0)
+        )
         self.last_vibration_time = None
+        self.write_buffer = PostureWriteBuffer(
+            flush_size=getattr(settings, 'POSTURE_WRITE_FLUSH_SIZE', 50),
+            flush_interval_ms=getattr(settings, 'POSTURE_WRITE_FLUSH_INTERVAL_MS', 1000.0),
+            max_pending_flushes=getattr(settings, 'POSTURE_WRITE_MAX_PENDING_FLUSHES', 2),
+            writer=(ingestion_writer.submit if getattr(settings, 'POSTURE_INGESTION_ENABLED', False)
+                    else bulk_create_posture_data),
+        )
+        self.calibration = None
+        self.posture_baseline = None
+        # Reused float32 (tilt_x, tilt_y, gyro_x, gyro_y, gyro_z) row for every sample
+        self.sample_row = sensor_row({})
+        self.fall_window = None
+        if getattr(settings, 'FALL_DETECTION_MODE', 'sample') == 'window':
+            self.fall_window = FallFeatureWindow(
+                window_size=getattr(settings, 'FALL_WINDOW_SIZE', 20),
+                stillness_size=getattr(settings, 'FALL_STILLNESS_SIZE', 10),
+                stride=getattr(settings, 'FALL_WINDOW_STRIDE', 5),
+                sample_interval=getattr(settings, 'FALL_SAMPLE_INTERVAL', 0.1),
+            )
+        self.fall_gate = None
+        if getattr(settings, 'FALL_GATE_ENABLED', False):
+            self.fall_gate = FallGate(
+                magnitude_threshold=getattr(settings, 'FALL_GATE_MAGNITUDE', 3.0),
+                rate_threshold=getattr(settings, 'FALL_GATE_RATE', 20.0),
+                hold_samples=getattr(settings, 'FALL_GATE_HOLD_SAMPLES', 20),
+                sample_interval=getattr(settings, 'FALL_SAMPLE_INTERVAL', 0.1),
+            )
+        # One EmergencyAlert per fall rather than per positive sample
+        self.fall_incidents = FallIncidentTracker(
+            quiet_seconds=getattr(settings, 'FALL_INCIDENT_QUIET_SECONDS', 30.0),
+            suppress_seconds=getattr(settings, 'FALL_ALERT_SUPPRESS_SECONDS', 300.0),
+        )
         
     async def connect(self):
         await self.accept()
         
     async def disconnect(self, close_code):
+        if self.update_timer is not None:
+            self.update_timer.cancel()
+        # Never drop buffered samples when the device goes away
+        await self.write_buffer.close()
+        incident = self.fall_incidents.close()
+        if incident is not None and incident.alert_id is not None:
+            await self.save_fall_incident(incident)
         if self.user:
             await self.update_device_connection_status(self.user.id, False)
+            if self.channel_layer is not None:
+                await self.channel_layer.group_discard(profile_group(self.user.id), self.channel_name)
     
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         try:
+            if bytes_data is not None:
+                # Packed sensor frames from devices; the browser keeps using JSON
+                await self.handle_binary_frame(bytes_data)
+                return
+            
             data = json.loads(text_data)
             message_type = data.get('type')
             
@@ -33,6 +113,8 @@ class PostureConsumer(AsyncWebsocketConsumer):
                 await self.handle_device_connection(data)
             elif message_type == 'posture_data':
                 await self.handle_posture_data(data)
+            elif message_type == 'calibration_start':
+                await self.handle_calibration_start(data)
             elif message_type == 'heartbeat':
                 await self.send(text_data=json.dumps({'type': 'heartbeat_ack'}))
                 
@@ -50,8 +132,20 @@ class PostureConsumer(AsyncWebsocketConsumer):
             self.user = await database_sync_to_async(User.objects.get)(id=user_id)
             self.device_id = device_id
             
-            # Update device connection status
-            await self.update_device_connection_status(user_id, True, device_id)
+            # Load (or benchmark) the models off the event loop before the
+            # baseline check and the first frame need them
+            await inference_executor.run(posture_analyzer.load_models, timeout=None)
+            
+            # Update device connection status and load the profile for this connection
+            await self.set_profile(await self.update_device_connection_status(user_id, True, device_id))
+            # Settings changes reach this connection as profile.changed messages
+            if self.channel_layer is not None:
+                await self.channel_layer.group_add(profile_group(self.user.id), self.channel_name)
+            # A reconnect right after a fall must not call the contact again
+            self.fall_incidents.last_notified = await self.get_last_fall_notification(user_id)
+            
+            # Deliver any alerts still in the outbox from before a restart
+            alert_dispatcher.start()
             
             await self.send(text_data=json.dumps({
                 'type': 'connection_success',
@@ -69,83 +163,389 @@ class PostureConsumer(AsyncWebsocketConsumer):
         if not self.user:
             return
         
-        sensor_data = data.get('sensor_data', {})
-        tilt_x = sensor_data.get('tilt_x', 0)
-        tilt_y = sensor_data.get('tilt_y', 0)
-        gyro_x = sensor_data.get('gyro_x', 0)
-        gyro_y = sensor_data.get('gyro_y', 0)
-        gyro_z = sensor_data.get('gyro_z', 0)
+        # Devices streaming at 50-100 Hz send several timestamped readings per message
+        if 'samples' in data:
+            samples = data['samples']
+            if samples:
+                await self.handle_posture_frame(
+                    sensor_matrix(samples),
+                    [self.sample_timestamp(sample.get('timestamp')) for sample in samples]
+                )
+            return
         
-        # Analyze posture and fall detection
-        posture_result = posture_analyzer.predict_posture(tilt_x, tilt_y)
-        fall_result = posture_analyzer.predict_fall(gyro_x, gyro_y, gyro_z)
+        # Analyze posture and fall detection from one float32 row
+        sample = sensor_row(data.get('sensor_data', {}), self.sample_row)
+        tilt_x, tilt_y, gyro_x, gyro_y, gyro_z = sample.tolist()
+        analysis = await self.analyze_sample(sample)
         
-        # Save to database
-        posture_data = await self.save_posture_data(
+        if self.calibration is not None:
+            await self.collect_calibration_sample(tilt_x, tilt_y)
+        
+        # Queue for the next bulk write
+        await self.save_posture_data(
             self.user.id, tilt_x, tilt_y, gyro_x, gyro_y, gyro_z,
-            posture_result.get('is_correct') if posture_result else None,
-            fall_result.get('is_fall') if fall_result else False
+            analysis.is_correct,
+            bool(analysis.is_fall)
         )
         
         # Check for fall detection
-        if fall_result and fall_result.get('is_fall'):
+        if analysis.is_fall:
             await self.handle_fall_detection()
         
         # Check for posture correction
-        if posture_result:
-            await self.handle_posture_monitoring(posture_result.get('is_correct'))
+        if analysis.is_correct is not None:
+            await self.handle_posture_monitoring(analysis.is_correct)
         
         # Send real-time data to frontend
+        await self.push_update({
+            'timestamp': timezone.now().isoformat(),
+            'tilt_x': tilt_x,
+            'tilt_y': tilt_y,
+            'gyro_x': gyro_x,
+            'gyro_y': gyro_y,
+            'gyro_z': gyro_z,
+            'posture_correct': analysis.is_correct,
+            'posture_confidence': analysis.posture_confidence,
+            'fall_detected': bool(analysis.is_fall),
+            'fall_confidence': analysis.fall_confidence,
+            'model_version': posture_analyzer.model_versions,
+        }, self.sample_row, int(analysis.is_correct is True), int(analysis.is_correct is not None))
+    
+    async def handle_binary_frame(self, bytes_data):
+        frame = decode_frame(bytes_data)
+        if not self.user:
+            return
+        if self.device_id and frame.device_id != self.device_id:
+            raise FrameError(f"Frame from device {frame.device_id!r} on the connection of {self.device_id!r}")
+        
+        # Sequence numbers wrap at 2**32; a jump forward means frames were lost
+        if self.last_sequence is not None:
+            step = (frame.sequence - self.last_sequence) % 2 ** 32
+            if 1 < step < 2 ** 31:
+                self.frames_lost += step - 1
+        self.last_sequence = frame.sequence
+        
+        if len(frame.samples):
+            timestamps = [None] * len(frame.samples)
+            if frame.timestamps is not None:
+                timestamps = [self.sample_timestamp(timestamp) for timestamp in frame.timestamps.tolist()]
+            await self.handle_posture_frame(frame.samples, timestamps)
+    
+    async def handle_posture_frame(self, frame, timestamps):
+        analysis = await self.analyze_frame(frame)
+        
+        if self.calibration is not None:
+            for tilt_x, tilt_y in frame[:, POSTURE_COLUMNS].tolist():
+                if self.calibration is None:
+                    break
+                await self.collect_calibration_sample(tilt_x, tilt_y)
+        
+        # Queue every reading for the next bulk write
+        values = frame.tolist()
+        for (tilt_x, tilt_y, gyro_x, gyro_y, gyro_z), is_correct, is_fall, timestamp in zip(
+                values, analysis.is_correct, analysis.is_fall, timestamps):
+            await self.save_posture_data(
+                self.user.id, tilt_x, tilt_y, gyro_x, gyro_y, gyro_z,
+                is_correct,
+                bool(is_fall),
+                timestamp=timestamp
+            )
+        
+        # Every positive sample in the frame joins the same incident
+        falls = sum(1 for is_fall in analysis.is_fall if is_fall)
+        if falls:
+            await self.handle_fall_detection(falls)
+        
+        for is_correct, timestamp in zip(analysis.is_correct, timestamps):
+            if is_correct is not None:
+                await self.handle_posture_monitoring(is_correct, timestamp)
+        
+        # One aggregated update for the whole frame, led by its latest reading
+        latest = dict(zip(SENSOR_CHANNELS, values[-1]))
+        evaluated = [(is_correct, confidence)
+                     for is_correct, confidence in zip(analysis.is_correct, analysis.posture_confidence)
+                     if is_correct is not None]
+        fall_confidences = [confidence for confidence in analysis.fall_confidence if confidence is not None]
+        await self.push_update({
+            'timestamp': timezone.now().isoformat(),
+            'tilt_x': latest.get('tilt_x', 0),
+            'tilt_y': latest.get('tilt_y', 0),
+            'gyro_x': latest.get('gyro_x', 0),
+            'gyro_y': latest.get('gyro_y', 0),
+            'gyro_z': latest.get('gyro_z', 0),
+            'posture_correct': evaluated[-1][0] if evaluated else None,
+            'posture_confidence': evaluated[-1][1] if evaluated else None,
+            'fall_detected': any(analysis.is_fall),
+            'fall_confidence': max(fall_confidences) if fall_confidences else None,
+            'model_version': posture_analyzer.model_versions,
+            'frames_lost': self.frames_lost,
+        }, frame, sum(1 for is_correct, _ in evaluated if is_correct), len(evaluated))
+    
+    async def push_update(self, data, readings, correct, evaluated):
+        # The UI only redraws at display rate; readings in between are folded
+        # into the next update, which a fall always sends right away
+        self.update_throttle.add(data, readings, correct, evaluated)
+        delay = self.update_throttle.delay()
+        if delay == 0 or data['fall_detected']:
+            await self.send_pending_update()
+        elif self.update_timer is None:
+            self.update_timer = asyncio.get_running_loop().call_later(delay, self.send_update_later)
+    
+    def send_update_later(self):
+        self.update_timer = None
+        self.update_task = asyncio.get_running_loop().create_task(self.send_pending_update())
+    
+    async def send_pending_update(self):
+        if self.update_timer is not None:
+            self.update_timer.cancel()
+            self.update_timer = None
+        if not self.update_throttle.pending:
+            return
         await self.send(text_data=json.dumps({
             'type': 'posture_update',
-            'data': {
-                'timestamp': timezone.now().isoformat(),
-                'tilt_x': tilt_x,
-                'tilt_y': tilt_y,
-                'gyro_x': gyro_x,
-                'gyro_y': gyro_y,
-                'gyro_z': gyro_z,
-                'posture_correct': posture_result.get('is_correct') if posture_result else None,
-                'posture_confidence': posture_result.get('confidence') if posture_result else None,
-                'fall_detected': fall_result.get('is_fall') if fall_result else False,
-                'fall_confidence': fall_result.get('confidence') if fall_result else None,
-            }
+            'data': self.update_throttle.take()
+        }))
+    
+    def sample_timestamp(self, timestamp):
+        # Frame samples may carry their own Unix timestamp (seconds); missing,
+        # invalid or implausibly skewed ones fall back to the time of arrival
+        now = timezone.now()
+        try:
+            timestamp = datetime.fromtimestamp(float(timestamp), tz=dt_timezone.utc)
+        except (TypeError, ValueError, OverflowError, OSError):
+            return now
+        if abs((timestamp - now).total_seconds()) > getattr(settings, 'FRAME_TIMESTAMP_MAX_SKEW', 300.0):
+            return now
+        return timestamp
+    
+    async def analyze_frame(self, frame):
+        """
+        Posture and fall results for an (n, 5) float32 frame, with the baseline,
+        fall gate and fall window applied in sample order
+        Returns: SampleAnalysis of per-sample lists (None where a model did not run)
+        """
+        n = len(frame)
+        is_correct = [None] * n
+        posture_confidence = [None] * n
+        is_fall = [None] * n
+        fall_confidence = [None] * n
+        
+        needs_posture = np.ones(n, dtype=bool)
+        if self.posture_baseline is not None:
+            correct, answered = self.posture_baseline.classify_many(frame[:, POSTURE_COLUMNS])
+            for i in np.flatnonzero(answered).tolist():
+                is_correct[i] = bool(correct[i])
+            needs_posture = ~answered
+        
+        needs_fall = np.zeros(n, dtype=bool)
+        windows = []
+        for i, gyro in enumerate(frame[:, FALL_COLUMNS].tolist()):
+            plausible = self.fall_gate.update(*gyro) if self.fall_gate else True
+            if self.fall_window is None:
+                needs_fall[i] = plausible
+            elif self.fall_window.push(*gyro) and plausible:
+                # The window moves on with the next sample, so freeze it now
+                windows.append((i, self.fall_window.snapshot()))
+        
+        for i, window in windows:
+            # A slow fall check is never dropped as "no fall"
+            fall_result = await inference_executor.run(posture_analyzer.predict_fall_window, window, timeout=None)
+            if fall_result:
+                is_fall[i] = fall_result['is_fall']
+                fall_confidence[i] = fall_result['confidence']
+        
+        if needs_posture.any():
+            rows = np.flatnonzero(needs_posture).tolist()
+            posture = await inference_executor.run(posture_analyzer.analyze_samples, frame[needs_posture], fall=False)
+            if posture is not None and posture.is_correct is not None:
+                for i, correct, confidence in zip(rows, posture.is_correct.tolist(), posture.posture_confidence.tolist()):
+                    is_correct[i] = correct
+                    posture_confidence[i] = confidence
+        if needs_fall.any():
+            rows = np.flatnonzero(needs_fall).tolist()
+            fall = await inference_executor.run(
+                posture_analyzer.analyze_samples, frame[needs_fall], posture=False, timeout=None
+            )
+            if fall is not None and fall.is_fall is not None:
+                for i, detected, confidence in zip(rows, fall.is_fall.tolist(), fall.fall_confidence.tolist()):
+                    is_fall[i] = detected
+                    fall_confidence[i] = confidence
+        
+        return SampleAnalysis(is_correct, posture_confidence, is_fall, fall_confidence)
+    
+    async def analyze_sample(self, sample):
+        # Most samples sit clearly inside or outside the user's calibrated
+        # upright baseline; only ambiguous ones need the posture model
+        baseline_result = None
+        if self.posture_baseline is not None:
+            baseline_result = self.posture_baseline.classify(sample[0], sample[1])
+        
+        # Ordinary motion never reaches the fall model
+        gyro = sample[FALL_COLUMNS].tolist()
+        plausible = self.fall_gate.update(*gyro) if self.fall_gate else True
+        window_ready = False
+        if self.fall_window is not None:
+            # Only evaluate the model on a full window at each stride boundary
+            window_ready = self.fall_window.push(*gyro) and plausible
+        per_sample_fall = self.fall_window is None and plausible
+        
+        if getattr(settings, 'ML_BATCHING_ENABLED', False):
+            # Share vectorized model calls with every other connection in this process;
+            # the posture and fall requests wait out the same batching window
+            requests = {}
+            if baseline_result is None:
+                requests['posture'] = inference_batcher.predict_posture(sample[0], sample[1])
+            if per_sample_fall:
+                requests['fall'] = inference_batcher.predict_fall(*gyro)
+            results = dict(zip(requests, await asyncio.gather(*requests.values())))
+            analysis = SampleAnalysis.from_results(results.get('posture', baseline_result), results.get('fall'))
+        elif baseline_result is not None and not per_sample_fall:
+            # Nothing left for the models to do
+            analysis = SampleAnalysis(baseline_result['is_correct'], None, None, None)
+        else:
+            # Model calls run on the bounded inference pool, never on the event loop;
+            # only a posture-only call may be abandoned when it is slow
+            analysis = await inference_executor.run(
+                posture_analyzer.analyze_sample, sample.copy(), posture=baseline_result is None, fall=per_sample_fall,
+                timeout=None if per_sample_fall else DEFAULT_TIMEOUT,
+            ) or SampleAnalysis(None, None, None, None)
+            if baseline_result is not None:
+                analysis = analysis._replace(is_correct=baseline_result['is_correct'], posture_confidence=None)
+        
+        if window_ready:
+            fall_result = await inference_executor.run(
+                posture_analyzer.predict_fall_window, self.fall_window.snapshot(), timeout=None
+            )
+            analysis = analysis._replace(
+                is_fall=fall_result['is_fall'] if fall_result else None,
+                fall_confidence=fall_result['confidence'] if fall_result else None,
+            )
+        return analysis
+    
+    async def set_profile(self, profile):
+        self.profile = profile
+        self.posture_baseline = await self.build_posture_baseline(profile)
+    
+    async def profile_changed(self, event):
+        # Sent by the settings view (or a calibration on another connection)
+        if self.user:
+            await self.set_profile(await self.load_profile(self.user.id))
+    
+    async def build_posture_baseline(self, profile):
+        """Fast-path classifier for the profile's baseline, if the current model agrees with it"""
+        if not getattr(settings, 'POSTURE_BASELINE_ENABLED', True):
+            return None
+        classifier = BaselineClassifier.from_profile(
+            profile,
+            inner_radius=getattr(settings, 'POSTURE_BASELINE_INNER_RADIUS', 2.0),
+        )
+        if classifier is None or not await self.verify_posture_baseline(classifier):
+            return None
+        return classifier
+    
+    async def verify_posture_baseline(self, classifier):
+        """
+        Check the classifier's answered ellipse against the posture model
+        Returns: True if the model calls every probe point correct, False if it
+        rejects one, None if the model could not be asked
+        """
+        # Not abandoned when slow: a missing answer disables the fast path for the whole connection
+        results = await inference_executor.run(
+            posture_analyzer.predict_posture_batch, classifier.probe_points(), timeout=None
+        )
+        if not results or any(result is None for result in results):
+            return None
+        return all(result['is_correct'] for result in results)
+    
+    async def handle_calibration_start(self, data):
+        if not self.user:
+            return
+        
+        # The next posture_data samples are recorded as the user's upright posture
+        self.calibration = CalibrationWindow(size=getattr(settings, 'POSTURE_CALIBRATION_SAMPLES', 50))
+        await self.send(text_data=json.dumps({
+            'type': 'calibration_started',
+            'samples': self.calibration.size
         }))
     
-    async def handle_fall_detection(self):
-        # Create emergency alert
-        await self.create_emergency_alert(self.user.id, 'fall')
+    async def collect_calibration_sample(self, tilt_x, tilt_y):
+        try:
+            if not self.calibration.add(tilt_x, tilt_y):
+                return
+        except (TypeError, ValueError):
+            return
+        
+        mean, covariance = self.calibration.baseline()
+        self.calibration = None
         
-        # Send emergency call
-        emergency_contact = await self.get_emergency_contact(self.user.id)
-        if emergency_contact:
-            await database_sync_to_async(send_emergency_call)(emergency_contact, self.user.username)
+        # Never teach the fast path a region the model considers poor posture
+        classifier = BaselineClassifier(
+            mean, covariance, inner_radius=getattr(settings, 'POSTURE_BASELINE_INNER_RADIUS', 2.0)
+        )
+        verified = await self.verify_posture_baseline(classifier)
+        if not verified:
+            await self.send(text_data=json.dumps({
+                'type': 'calibration_failed',
+                'message': ('Calibration posture was not upright. Sit up straight and try again.' if verified is False
+                            else 'Posture model unavailable. Try calibrating again later.')
+            }))
+            return
+        
+        self.profile = await self.save_posture_baseline(self.user.id, mean, covariance)
+        self.posture_baseline = classifier if getattr(settings, 'POSTURE_BASELINE_ENABLED', True) else None
+        # The user's other connections pick up the new baseline too
+        if self.channel_layer is not None:
+            await self.channel_layer.group_send(profile_group(self.user.id), PROFILE_CHANGED)
+        await self.send(text_data=json.dumps({
+            'type': 'calibration_complete',
+            'mean': mean,
+            'covariance': covariance,
+            'timestamp': timezone.now().isoformat()
+        }))
+    
+    async def handle_fall_detection(self, samples=1):
+        # Consecutive positive samples of one fall attach to its open incident
+        decision = self.fall_incidents.observe(samples)
+        if decision.closed is not None and decision.closed.alert_id is not None:
+            await self.save_fall_incident(decision.closed)
+        if not decision.opened:
+            return
+        
+        # Create emergency alert; without a contact nothing is sent, and the
+        # cooldown must not hold back a contact added later
+        emergency_contact = self.profile.emergency_contact if self.profile else None
+        if not decision.notify:
+            suppression_reason = 'cooldown'
+        elif not emergency_contact:
+            suppression_reason = 'no_contact'
+        else:
+            suppression_reason = ''
+        alert = await self.create_emergency_alert(self.user.id, 'fall', suppression_reason=suppression_reason)
+        decision.incident.alert_id = alert.id
+        
+        # Queue the SMS and call; the alert dispatcher delivers them in the background
+        if not suppression_reason:
+            await enqueue_emergency_notifications(alert, emergency_contact, fall_alert_message(self.user.username))
+            self.fall_incidents.mark_notified(decision.incident)
+            alert_dispatcher.wake()
         
         # Send alert to frontend
         await self.send(text_data=json.dumps({
             'type': 'fall_alert',
-            'message': 'Fall detected! Emergency services contacted.',
+            'message': FALL_ALERT_MESSAGES[suppression_reason],
+            'alert_id': alert.id,
             'timestamp': timezone.now().isoformat()
         }))
     
-    async def handle_posture_monitoring(self, is_correct_posture):
-        # Add to posture history
-        self.posture_history.append({
-            'timestamp': timezone.now(),
-            'is_correct': is_correct_posture
-        })
-        
-        # Keep only last 5 minutes of data (300 seconds / 0.1 second intervals = 3000 samples)
+    async def handle_posture_monitoring(self, is_correct_posture, timestamp=None):
+        # Add to posture history at the sample's own time (Unix seconds);
+        # samples older than 5 minutes expire from its head
+        self.posture_history.push(is_correct_posture, timestamp.timestamp() if timestamp else time.time())
         current_time = timezone.now()
-        self.posture_history = [
-            entry for entry in self.posture_history 
-            if (current_time - entry['timestamp']).total_seconds() <= 300
-        ]
-        
-        # Check if posture incorrectness is above 60% for 5 minutes
-        if len(self.posture_history) >= 100:  # At least 10 seconds of data
-            incorrect_count = sum(1 for entry in self.posture_history if not entry['is_correct'])
-            incorrectness_percentage = (incorrect_count / len(self.posture_history)) * 100
+        
+        # Check if posture incorrectness is above 60% for 5 minutes, whatever the sample rate
+        if self.posture_history.span >= getattr(settings, 'POSTURE_MIN_HISTORY_SECONDS', 10.0):
+            incorrectness_percentage = self.posture_history.incorrect_percentage
             
             if incorrectness_percentage >= 60:
                 # Check if 5 minutes have passed since last vibration
@@ -170,9 +570,11 @@ class PostureConsumer(AsyncWebsocketConsumer):
             'timestamp': timezone.now().isoformat()
         }))
     
-    @database_sync_to_async
-    def save_posture_data(self, user_id, tilt_x, tilt_y, gyro_x, gyro_y, gyro_z, is_correct_posture, is_fall_detected):
-        return PostureData.objects.create(
+    async def save_posture_data(self, user_id, tilt_x, tilt_y, gyro_x, gyro_y, gyro_z, is_correct_posture,
+                                is_fall_detected, timestamp=None):
+        # Waits when this connection's writes fall behind
+        await self.write_buffer.add(
+            timestamp=timestamp or timezone.now(),
             user_id=user_id,
             tilt_x=tilt_x,
             tilt_y=tilt_y,
@@ -185,24 +587,63 @@ class PostureConsumer(AsyncWebsocketConsumer):
     
     @database_sync_to_async
     def update_device_connection_status(self, user_id, is_connected, device_id=None):
+        """
+        Mark the device connected or disconnected
+        Returns: ProfileSnapshot when connecting, None when disconnecting
+        """
+        if not is_connected:
+            UserProfile.objects.filter(user_id=user_id).update(is_device_connected=False)
+            return None
+        
+        profile, created = UserProfile.objects.get_or_create(
+            user_id=user_id, defaults={'is_device_connected': True, 'device_id': device_id}
+        )
+        # Only write the fields that actually changed
+        changes = {}
+        if not profile.is_device_connected:
+            changes['is_device_connected'] = True
+        if device_id and profile.device_id != device_id:
+            changes['device_id'] = device_id
+        if changes:
+            UserProfile.objects.filter(pk=profile.pk).update(**changes)
+            for field, value in changes.items():
+                setattr(profile, field, value)
+        return ProfileSnapshot.from_profile(profile)
+    
+    @database_sync_to_async
+    def load_profile(self, user_id):
+        profile, created = UserProfile.objects.get_or_create(user_id=user_id)
+        return ProfileSnapshot.from_profile(profile)
+    
+    @database_sync_to_async
+    def save_posture_baseline(self, user_id, mean, covariance):
         profile, created = UserProfile.objects.get_or_create(user_id=user_id)
-        profile.is_device_connected = is_connected
-        if device_id:
-            profile.device_id = device_id
+        profile.posture_baseline_mean = mean
+        profile.posture_baseline_covariance = covariance
+        profile.posture_calibrated_at = timezone.now()
         profile.save()
-        return profile
+        return ProfileSnapshot.from_profile(profile)
     
     @database_sync_to_async
-    def create_emergency_alert(self, user_id, alert_type):
+    def create_emergency_alert(self, user_id, alert_type, suppression_reason=''):
         return EmergencyAlert.objects.create(
             user_id=user_id,
-            alert_type=alert_type
+            alert_type=alert_type,
+            notification_suppressed=bool(suppression_reason),
+            suppression_reason=suppression_reason
         )
     
     @database_sync_to_async
-    def get_emergency_contact(self, user_id):
-        try:
-            profile = UserProfile.objects.get(user_id=user_id)
-            return profile.emergency_contact
-        except UserProfile.DoesNotExist:
-            return None
\ No newline at end of file
+    def save_fall_incident(self, incident):
+        EmergencyAlert.objects.filter(pk=incident.alert_id).update(
+            fall_samples=incident.samples,
+            last_detected_at=datetime.fromtimestamp(incident.last_seen, tz=dt_timezone.utc)
+        )
+    
+    @database_sync_to_async
+    def get_last_fall_notification(self, user_id):
+        """Unix time of the user's latest fall alert that notified their contact, or None"""
+        alert = EmergencyAlert.objects.filter(
+            user_id=user_id, alert_type='fall', notification_suppressed=False
+        ).order_by('-timestamp').first()
+        return alert.timestamp.timestamp() if alert else None
@@ -0,0 +1,154 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .metrics import Histogram
+
+# Sentinel for run(): use the executor's default timeout
+DEFAULT = object()
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed sleep.
+
+    Lag is the time the loop spent running something else (usually blocking
+    code) when it should have been serving websockets; samples above
+    stall_threshold_ms are counted as stalls.
+    """
+
+    def __init__(self, interval=0.1, stall_threshold_ms=100.0):
+        self.interval = interval
+        self.stall_threshold = stall_threshold_ms / 1000.0
+        self.stalls = 0
+        self.max_lag_ms = 0.0
+        self.lag_histogram = Histogram((1, 2, 5, 10, 20, 50, 100, 250, 500, 1000))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            self.lag_histogram.observe(lag * 1000.0)
+            self.max_lag_ms = max(self.max_lag_ms, lag * 1000.0)
+            if lag >= self.stall_threshold:
+                self.stalls += 1
+
+    def stats(self):
+        return {
+            'stalls': self.stalls,
+            'max_lag_ms': self.max_lag_ms,
+            'lag_ms': self.lag_histogram.snapshot(),
+        }
+
+
+class InferenceExecutor:
+    """
+    Bounded execution stage for CPU-bound model calls.
+
+    Calls run on a dedicated thread pool of max_workers threads. Callers wait
+    on a semaphore with one permit per thread, held until the thread is
+    actually done, so an admitted call starts at once and the timeout measures
+    the call itself rather than time spent queued behind others. A call that
+    takes longer than timeout seconds is abandoned (its caller gets None) but
+    keeps its thread until it finishes. A LoopLagMonitor runs next to it on
+    every loop the executor is used from.
+    """
+
+    def __init__(self, max_workers=2, timeout=2.0, lag_interval=0.1, stall_threshold_ms=100.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.lag_monitor = LoopLagMonitor(lag_interval, stall_threshold_ms)
+        self._pool = None
+        self._loop = None
+        self._semaphore = None
+        self._monitor_task = None
+
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        # Calls without a timeout that ran longer than one would have allowed
+        self.slow_calls = 0
+        self.in_flight = 0
+        self.queue_wait_histogram = Histogram((0.1, 0.5, 1, 2, 5, 10, 20, 50, 100))
+        self.run_time_histogram = Histogram((0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 1000))
+
+    def _ensure_started(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+        # The semaphore and lag monitor belong to the running loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._monitor_task = loop.create_task(self.lag_monitor.run())
+        return loop
+
+    async def run(self, function, *args, timeout=DEFAULT, **kwargs):
+        """
+        Run function(*args, **kwargs) on the inference pool
+        Returns: its result, or None if it raised or exceeded timeout. None
+        waits for the result however long it takes; use it for calls whose
+        answer must not be lost, such as fall checks.
+        """
+        loop = self._ensure_started()
+        timeout = self.timeout if timeout is DEFAULT else timeout
+        semaphore = self._semaphore
+        queued = time.perf_counter()
+
+        await semaphore.acquire()
+        started = time.perf_counter()
+        self.queue_wait_histogram.observe((started - queued) * 1000.0)
+        self.calls += 1
+        self.in_flight += 1
+        future = loop.run_in_executor(self._pool, functools.partial(function, *args, **kwargs))
+        future.add_done_callback(functools.partial(self._finished, semaphore, started, timeout is None))
+        try:
+            # Shielded: giving up on the result must not free the permit while the thread still runs
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"Inference call {getattr(function, '__name__', function)} timed out after {timeout}s")
+            return None
+        except Exception as e:
+            self.errors += 1
+            print(f"Error running inference call: {e}")
+            return None
+
+    def _finished(self, semaphore, started, unbounded, future):
+        elapsed = time.perf_counter() - started
+        self.in_flight -= 1
+        self.run_time_histogram.observe(elapsed * 1000.0)
+        if unbounded and elapsed > self.timeout:
+            self.slow_calls += 1
+        if not future.cancelled():
+            # Abandoned calls still have their exception retrieved here
+            future.exception()
+        semaphore.release()
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'timeout': self.timeout,
+            'calls': self.calls,
+            'in_flight': self.in_flight,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'slow_calls': self.slow_calls,
+            'queue_wait_ms': self.queue_wait_histogram.snapshot(),
+            'run_time_ms': self.run_time_histogram.snapshot(),
+            'event_loop': self.lag_monitor.stats(),
+        }
+
+
+# Global execution stage shared by every consumer in this process
+inference_executor = InferenceExecutor(
+    max_workers=getattr(settings, 'ML_INFERENCE_WORKERS', 2),
+    timeout=getattr(settings, 'ML_INFERENCE_TIMEOUT', 2.0),
+    lag_interval=getattr(settings, 'EVENT_LOOP_LAG_INTERVAL', 0.1),
+    stall_threshold_ms=getattr(settings, 'EVENT_LOOP_STALL_MS', 100.0),
+)
@@ -0,0 +1,131 @@
+import json
+import math
+import threading
+
+import numpy as np
+from django.conf import settings
+
+
+def save_replay_result(result, path):
+    """Write a measure_gate_recall() result where running servers report it from"""
+    with open(path, 'w') as replay_file:
+        json.dump(result, replay_file, indent=2)
+
+
+def load_replay_result(path):
+    """
+    Read the result saved by the last replay_fall_gate run
+    Returns: the result dict, or None if there is none (or it is unreadable)
+    """
+    if path is None:
+        return None
+    try:
+        with open(path) as replay_file:
+            return json.load(replay_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Error reading fall gate replay result: {e}")
+        return None
+
+
+class GateStats:
+    """
+    Process-wide counters for every FallGate, reported together with the
+    recall measured by the last replay_fall_gate run (read from replay_path,
+    since that runs in its own process)
+    """
+
+    def __init__(self, replay_path=None):
+        self.evaluated = 0
+        self.gated = 0
+        self.replay_path = replay_path
+        self._lock = threading.Lock()
+
+    def record(self, passed):
+        with self._lock:
+            if passed:
+                self.evaluated += 1
+            else:
+                self.gated += 1
+
+    def snapshot(self):
+        total = self.evaluated + self.gated
+        replay = load_replay_result(self.replay_path)
+        return {
+            'evaluated': self.evaluated,
+            'gated': self.gated,
+            'gated_fraction': self.gated / total if total else 0.0,
+            'recall': replay['recall'] if replay else None,
+            'replay': replay,
+        }
+
+
+fall_gate_stats = GateStats(replay_path=getattr(settings, 'FALL_GATE_REPLAY_FILE', None))
+
+
+class FallGate:
+    """
+    Cheap per-device physics pre-filter in front of the fall model.
+
+    A sample is plausibly part of a fall when the angular-velocity magnitude or
+    its rate of change exceeds a threshold. Once triggered the gate stays open
+    for hold_samples more samples so the impact and its aftermath are still
+    classified; everything else skips the model.
+    """
+
+    def __init__(self, magnitude_threshold=3.0, rate_threshold=20.0, hold_samples=20,
+                 sample_interval=0.1, stats=fall_gate_stats):
+        self.magnitude_threshold = magnitude_threshold
+        self.rate_threshold = rate_threshold
+        self.hold_samples = hold_samples
+        self.sample_interval = sample_interval
+        self.stats = stats
+        self._last_magnitude = None
+        self._open_for = 0
+
+    def update(self, gyro_x, gyro_y, gyro_z):
+        """Feed one sample; returns True if the fall model should see it"""
+        gyro_x, gyro_y, gyro_z = float(gyro_x), float(gyro_y), float(gyro_z)
+        magnitude = math.sqrt(gyro_x * gyro_x + gyro_y * gyro_y + gyro_z * gyro_z)
+        rate = 0.0
+        if self._last_magnitude is not None:
+            rate = abs(magnitude - self._last_magnitude) / self.sample_interval
+        self._last_magnitude = magnitude
+
+        if magnitude >= self.magnitude_threshold or rate >= self.rate_threshold:
+            self._open_for = self.hold_samples + 1
+
+        passed = self._open_for > 0
+        if passed:
+            self._open_for -= 1
+        if self.stats is not None:
+            self.stats.record(passed)
+        return passed
+
+
+def measure_gate_recall(analyzer, samples, **gate_options):
+    """
+    Replay (n, 3) gyro samples through a fresh FallGate and the full fall model
+    Returns: dict with the fraction of samples gated and the recall of model
+    positives that the gate let through
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    results = analyzer.predict_fall_batch(samples)
+    gate = FallGate(stats=None, **gate_options)
+    passed = np.array([gate.update(*sample) for sample in samples.tolist()], dtype=bool)
+    positives = np.array([bool(result and result['is_fall']) for result in results], dtype=bool)
+
+    detected = int((positives & passed).sum())
+    total_positives = int(positives.sum())
+    recall = detected / total_positives if total_positives else None
+    return {
+        'magnitude_threshold': gate.magnitude_threshold,
+        'rate_threshold': gate.rate_threshold,
+        'hold_samples': gate.hold_samples,
+        'samples': len(samples),
+        'gated_fraction': float(1.0 - passed.mean()) if len(samples) else 0.0,
+        'model_positives': total_positives,
+        'positives_passed': detected,
+        'recall': recall,
+    }
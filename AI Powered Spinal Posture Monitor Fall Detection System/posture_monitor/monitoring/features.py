@@ -0,0 +1,142 @@
+import math
+from collections import deque
+
+import numpy as np
+
+# Order of the values returned by FallFeatureWindow.features()
+WINDOW_FEATURES = (
+    'magnitude_mean',
+    'magnitude_peak',
+    'jerk_peak',
+    'magnitude_variance',
+    'stillness_variance',
+)
+
+
+class WindowSnapshot:
+    """Frozen copy of a FallFeatureWindow's features, safe to evaluate off the event loop"""
+
+    def __init__(self, features, peak_sample):
+        self._features = features
+        self.peak_sample = peak_sample
+
+    def features(self):
+        return self._features
+
+
+class FallFeatureWindow:
+    """
+    Streaming gyro features for one device over the last window_size samples.
+
+    Magnitudes live in a fixed-size NumPy ring buffer with running sums for the
+    mean and variance, and monotonic deques track the rolling peak magnitude and
+    peak jerk, so every push() is O(1) (amortized for the peaks). The trailing
+    stillness_size samples give the post-impact stillness variance.
+    """
+
+    def __init__(self, window_size=20, stillness_size=10, stride=5, sample_interval=0.1):
+        if not 0 < stillness_size <= window_size:
+            raise ValueError("stillness_size must be between 1 and window_size")
+        self.window_size = window_size
+        self.stillness_size = stillness_size
+        self.stride = stride
+        self.sample_interval = sample_interval
+
+        self._magnitudes = np.zeros(window_size, dtype=np.float64)
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._still_sum = 0.0
+        self._still_sum_sq = 0.0
+        # (sequence, magnitude, raw sample) with decreasing magnitudes
+        self._peaks = deque()
+        # (sequence, jerk) with decreasing jerks
+        self._jerk_peaks = deque()
+        self._last_magnitude = None
+        self._last_timestamp = None
+
+    @property
+    def is_full(self):
+        return self._count >= self.window_size
+
+    @property
+    def peak_sample(self):
+        """Raw (gyro_x, gyro_y, gyro_z) sample with the largest magnitude in the window"""
+        return self._peaks[0][2] if self._peaks else None
+
+    def push(self, gyro_x, gyro_y, gyro_z, timestamp=None):
+        """
+        Add one sample
+        Returns: True when the window is full and a stride boundary was reached,
+        i.e. when the fall model should be evaluated
+        """
+        gyro_x, gyro_y, gyro_z = float(gyro_x), float(gyro_y), float(gyro_z)
+        magnitude = math.sqrt(gyro_x * gyro_x + gyro_y * gyro_y + gyro_z * gyro_z)
+        seq = self._count
+        slot = seq % self.window_size
+
+        # Evict from the running sums before the ring slot is overwritten
+        if seq >= self.window_size:
+            evicted = self._magnitudes[slot]
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+        if seq >= self.stillness_size:
+            evicted = self._magnitudes[(seq - self.stillness_size) % self.window_size]
+            self._still_sum -= evicted
+            self._still_sum_sq -= evicted * evicted
+
+        self._magnitudes[slot] = magnitude
+        self._sum += magnitude
+        self._sum_sq += magnitude * magnitude
+        self._still_sum += magnitude
+        self._still_sum_sq += magnitude * magnitude
+
+        jerk = 0.0
+        if self._last_magnitude is not None:
+            interval = self.sample_interval
+            if timestamp is not None and self._last_timestamp is not None and timestamp > self._last_timestamp:
+                interval = timestamp - self._last_timestamp
+            jerk = abs(magnitude - self._last_magnitude) / interval
+        self._last_magnitude = magnitude
+        self._last_timestamp = timestamp
+
+        oldest = seq - self.window_size
+        while self._peaks and self._peaks[-1][1] <= magnitude:
+            self._peaks.pop()
+        self._peaks.append((seq, magnitude, (gyro_x, gyro_y, gyro_z)))
+        while self._peaks[0][0] <= oldest:
+            self._peaks.popleft()
+
+        while self._jerk_peaks and self._jerk_peaks[-1][1] <= jerk:
+            self._jerk_peaks.pop()
+        self._jerk_peaks.append((seq, jerk))
+        while self._jerk_peaks[0][0] <= oldest:
+            self._jerk_peaks.popleft()
+
+        self._count += 1
+        return self.is_full and (self._count - self.window_size) % self.stride == 0
+
+    @staticmethod
+    def _variance(total, total_sq, n):
+        mean = total / n
+        # Running sums can drift a hair below zero; variance never does
+        return max(total_sq / n - mean * mean, 0.0)
+
+    def features(self):
+        """Feature vector in WINDOW_FEATURES order"""
+        n = min(self._count, self.window_size)
+        still_n = min(self._count, self.stillness_size)
+        if n == 0:
+            return np.zeros(len(WINDOW_FEATURES), dtype=np.float64)
+
+        return np.array([
+            self._sum / n,
+            self._peaks[0][1],
+            self._jerk_peaks[0][1],
+            self._variance(self._sum, self._sum_sq, n),
+            self._variance(self._still_sum, self._still_sum_sq, still_n),
+        ], dtype=np.float64)
+
+    def snapshot(self):
+        """WindowSnapshot of the current features, unaffected by later push() calls"""
+        return WindowSnapshot(self.features(), self.peak_sample)
@@ -0,0 +1,64 @@
+import time
+from collections import namedtuple
+
+# Result of FallIncidentTracker.observe(): the incident the samples belong to,
+# whether they opened it, whether its emergency contact may be notified (no
+# cooldown in effect) and the previous incident if it ended (so its final
+# counts can be saved)
+FallDecision = namedtuple('FallDecision', ('incident', 'opened', 'notify', 'closed'))
+
+
+class FallIncident:
+    """One fall: its first and latest positive sample and how many there were"""
+
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.last_seen = started_at
+        self.samples = 0
+        self.alert_id = None
+        self.notified = False
+
+
+class FallIncidentTracker:
+    """
+    Per-device fall incident state machine.
+
+    The first positive sample opens an incident and later ones attach to it
+    until quiet_seconds pass without another, which closes it. Each incident
+    gets one EmergencyAlert; its emergency contact is notified only if no
+    earlier incident was notified within suppress_seconds. The cooldown starts
+    when the caller reports a notification actually sent with mark_notified().
+    """
+
+    def __init__(self, quiet_seconds=30.0, suppress_seconds=300.0, last_notified=None):
+        self.quiet_seconds = quiet_seconds
+        self.suppress_seconds = suppress_seconds
+        self.last_notified = last_notified
+        self.current = None
+
+    def observe(self, samples=1, now=None):
+        """Record samples positive fall samples (Unix time now); returns a FallDecision"""
+        now = time.time() if now is None else now
+        closed = None
+        if self.current is not None and now - self.current.last_seen > self.quiet_seconds:
+            closed = self.close()
+
+        opened = self.current is None
+        notify = False
+        if opened:
+            self.current = FallIncident(now)
+            notify = self.last_notified is None or now - self.last_notified >= self.suppress_seconds
+
+        self.current.samples += samples
+        self.current.last_seen = now
+        return FallDecision(self.current, opened, notify, closed)
+
+    def mark_notified(self, incident):
+        """Record that incident's emergency contact was notified, starting the cooldown"""
+        incident.notified = True
+        self.last_notified = incident.started_at
+
+    def close(self):
+        """End the open incident, if any; returns it"""
+        incident, self.current = self.current, None
+        return incident
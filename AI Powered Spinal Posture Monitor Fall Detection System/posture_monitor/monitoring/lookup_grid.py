@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+
+from .compiled_trees import CompiledForest, compile_estimator
+
+# Cells evaluated per apply() call while building the grid
+BUILD_CHUNK_CELLS = 8192
+
+
+class PostureLookupGrid:
+    """
+    Quantized (tilt_x, tilt_y) grid of precomputed posture labels and confidences.
+
+    A tree ensemble partitions the input space into axis-aligned boxes, so a
+    cell whose lower and upper corners land in the same leaf of every tree is
+    answered exactly by a single probability vector. Cells that straddle a
+    split are marked inexact and lookup() returns None for them so the caller
+    falls back to the model.
+    """
+
+    def __init__(self, model, tilt_range=(-90.0, 90.0), resolution=0.5):
+        forest = model if isinstance(model, CompiledForest) else compile_estimator(model)
+        if forest is None or forest.n_features_in_ != 2:
+            raise ValueError("Lookup grid requires a two-feature tree classifier")
+
+        self.low, self.high = float(tilt_range[0]), float(tilt_range[1])
+        self.resolution = float(resolution)
+        self.size = int(math.ceil((self.high - self.low) / self.resolution))
+
+        self.labels = np.zeros((self.size, self.size), dtype=forest.classes_.dtype)
+        self.confidences = np.zeros((self.size, self.size), dtype=np.float64)
+        self.exact = np.zeros((self.size, self.size), dtype=bool)
+        self._build(forest)
+
+    def _build(self, forest):
+        # Widen every cell slightly so rounding in lookup() can never step outside it
+        margin = self.resolution * 1e-6
+        edges = self.low + np.arange(self.size + 1) * self.resolution
+        lower = edges[:-1] - margin
+        upper = edges[1:] + margin
+
+        cell_x, cell_y = np.meshgrid(np.arange(self.size), np.arange(self.size), indexing='ij')
+        cell_x = cell_x.ravel()
+        cell_y = cell_y.ravel()
+
+        for start in range(0, len(cell_x), BUILD_CHUNK_CELLS):
+            ix = cell_x[start:start + BUILD_CHUNK_CELLS]
+            iy = cell_y[start:start + BUILD_CHUNK_CELLS]
+            low_leaves = forest.apply(np.column_stack((lower[ix], lower[iy])))
+            high_leaves = forest.apply(np.column_stack((upper[ix], upper[iy])))
+
+            probability = forest.value[low_leaves].sum(axis=1) / len(forest.roots)
+            self.labels[ix, iy] = forest.classes_.take(np.argmax(probability, axis=1))
+            self.confidences[ix, iy] = probability.max(axis=1)
+            self.exact[ix, iy] = (low_leaves == high_leaves).all(axis=1)
+
+    @property
+    def exact_fraction(self):
+        return float(self.exact.mean())
+
+    def lookup(self, tilt_x, tilt_y):
+        """
+        Return (label, confidence) for an exact cell, or None if the reading is
+        out of range or its cell straddles a decision boundary
+        """
+        if not (self.low <= tilt_x < self.high and self.low <= tilt_y < self.high):
+            return None
+
+        i = int((tilt_x - self.low) // self.resolution)
+        j = int((tilt_y - self.low) // self.resolution)
+        if i >= self.size or j >= self.size or not self.exact[i, j]:
+            return None
+
+        return self.labels[i, j].item(), self.confidences[i, j].item()
+
+    def lookup_many(self, X):
+        """
+        Vectorized lookup() over an (n, 2) array
+        Returns: (labels, confidences, hit) where hit marks the rows answered
+        by an exact cell; labels and confidences are meaningless elsewhere
+        """
+        X = np.asarray(X, dtype=np.float64)
+        in_range = ((X >= self.low) & (X < self.high)).all(axis=1)
+        cells = np.clip(((X - self.low) // self.resolution), 0, self.size - 1)
+        cells = np.where(in_range[:, np.newaxis], cells, 0).astype(np.intp)
+        i, j = cells[:, 0], cells[:, 1]
+
+        hit = in_range & self.exact[i, j]
+        return self.labels[i, j], self.confidences[i, j], hit
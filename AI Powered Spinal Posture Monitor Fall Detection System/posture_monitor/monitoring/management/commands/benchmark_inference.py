@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.benchmarks import DEFAULT_BATCH_SIZES, compare_reports, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Time PostureAnalyzer and SimplePostureAnalyzer inference at batch sizes from 1 to 1M'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_BATCH_SIZES),
+                            help='Comma-separated batch sizes')
+        parser.add_argument('--repeat', type=int, default=3, help='Best-of repetitions per measurement')
+        parser.add_argument('--budget', type=float, default=30.0,
+                            help='Skip measurements estimated to take longer than this many seconds')
+        parser.add_argument('--max-calls', type=int, default=1000,
+                            help='Rows timed for per-call APIs before scaling to the batch size')
+        parser.add_argument('--synthetic', action='store_true',
+                            help='Use synthetic stand-in models even when pickles exist')
+        parser.add_argument('--backend', help='Override ML_INFERENCE_BACKEND for PostureAnalyzer')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--compare', help='Fail if any measurement is slower than in this earlier JSON report')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed slowdown against --compare, as a fraction (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as previous_file:
+                    previous = json.load(previous_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        report = run_benchmarks(
+            batch_sizes=[int(size) for size in options['sizes'].split(',')],
+            repeat=options['repeat'],
+            budget=options['budget'],
+            max_calls=options['max_calls'],
+            force_synthetic=options['synthetic'],
+            backend=options['backend'],
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(report['results'])} results to {options['output']}"))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if previous is not None:
+            regressions = compare_reports(previous, report, options['tolerance'])
+            if regressions:
+                lines = [
+                    f"{entry['analyzer']}.{entry['operation']} x{entry['batch_size']}: "
+                    f"{entry['previous_seconds']:.4f}s -> {entry['seconds']:.4f}s ({entry['slowdown']:.2f}x)"
+                    for entry in regressions
+                ]
+                raise CommandError(f"{len(regressions)} benchmark regressions:\n" + '\n'.join(lines))
+            self.stderr.write(f"No regressions against {options['compare']}")
@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.compiled_trees import CompiledForest
+from monitoring.registry import MODEL_FILES, load_model_file, scan_model_files
+
+
+class Command(BaseCommand):
+    help = 'Export the pickled models in ML_MODELS_DIR to the array-based .npz format loaded without sklearn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models-dir', default=str(settings.ML_MODELS_DIR))
+        parser.add_argument('--output-dir', help='Where to write the .npz files (defaults to --models-dir)')
+
+    def handle(self, *args, **options):
+        from sklearn import __version__ as sklearn_version
+
+        models_dir = options['models_dir']
+        output_dir = options['output_dir'] or models_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+        pickled = scan_model_files(models_dir, formats=('pkl',))
+        if not pickled:
+            raise CommandError(f'No pickled models found in {models_dir}')
+
+        for kind, (version, path, _) in pickled.items():
+            estimator = load_model_file(path)
+            try:
+                forest = CompiledForest.from_estimator(estimator)
+            except (AttributeError, ValueError) as e:
+                self.stderr.write(f'Skipping {os.path.basename(path)}: {e}')
+                continue
+
+            name = MODEL_FILES[kind] + (f'.v{version}' if version else '') + '.npz'
+            target = os.path.join(output_dir, name)
+            forest.save(
+                target,
+                estimator=type(estimator).__name__,
+                sklearn_version=sklearn_version,
+                source=os.path.basename(path),
+            )
+
+            # Time the load the way the server will do it
+            started = time.perf_counter()
+            loaded = CompiledForest.load(target)
+            load_ms = (time.perf_counter() - started) * 1000.0
+            if loaded.n_features_in_ != forest.n_features_in_:
+                raise CommandError(f'Round trip of {name} failed')
+
+            self.stdout.write(
+                f'{os.path.basename(path)} ({os.path.getsize(path) / 1024:.0f} KB) -> '
+                f'{name} ({os.path.getsize(target) / 1024:.0f} KB, loads in {load_ms:.1f} ms)'
+            )
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.fall_gate import measure_gate_recall, save_replay_result
+from monitoring.ml_models import posture_analyzer
+from monitoring.views import read_csv_file
+
+
+class Command(BaseCommand):
+    help = 'Replay a gyro CSV (gyro_x, gyro_y, gyro_z) through the fall gate and measure its recall against the full model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--magnitude', type=float, default=getattr(settings, 'FALL_GATE_MAGNITUDE', 3.0))
+        parser.add_argument('--rate', type=float, default=getattr(settings, 'FALL_GATE_RATE', 20.0))
+        parser.add_argument('--hold', type=int, default=getattr(settings, 'FALL_GATE_HOLD_SAMPLES', 20))
+        parser.add_argument('--no-save', action='store_true',
+                            help='Do not save the result for the inference stats endpoint')
+
+    def handle(self, *args, **options):
+        if posture_analyzer.fall_model is None:
+            raise CommandError('No fall detection model is loaded')
+
+        with open(options['csv_path'], 'rb') as csv_file:
+            rows = read_csv_file(csv_file.read())
+        try:
+            samples = np.array([[row['gyro_x'], row['gyro_y'], row['gyro_z']] for row in rows], dtype=np.float64)
+        except (KeyError, ValueError) as e:
+            raise CommandError(f'Invalid gyro data: {e}')
+
+        result = measure_gate_recall(
+            posture_analyzer,
+            samples,
+            magnitude_threshold=options['magnitude'],
+            rate_threshold=options['rate'],
+            hold_samples=options['hold'],
+            sample_interval=getattr(settings, 'FALL_SAMPLE_INTERVAL', 0.1),
+        )
+        replay_path = getattr(settings, 'FALL_GATE_REPLAY_FILE', None)
+        if replay_path and not options['no_save']:
+            try:
+                save_replay_result(result, replay_path)
+            except OSError as e:
+                raise CommandError(f'Could not save replay result: {e}')
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0003_alertoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emergencyalert',
+            name='fall_samples',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='emergencyalert',
+            name='last_detected_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='emergencyalert',
+            name='notification_suppressed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:21
+
+from django.db import migrations, models
+
+
+def backfill_cooldown(apps, schema_editor):
+    # Alerts suppressed before reasons were recorded were all held back by the cooldown
+    EmergencyAlert = apps.get_model('monitoring', 'EmergencyAlert')
+    EmergencyAlert.objects.filter(notification_suppressed=True).update(suppression_reason='cooldown')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_emergencyalert_incident'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emergencyalert',
+            name='suppression_reason',
+            field=models.CharField(blank=True, choices=[('cooldown', 'Recent Fall Already Notified'), ('no_contact', 'No Emergency Contact')], max_length=20),
+        ),
+        migrations.RunPython(backfill_cooldown, migrations.RunPython.noop),
+    ]
@@ -1,195 +1,417 @@
-import joblib
+from collections import namedtuple
+
+import numpy as np
 from django.conf import settings
-import os
+from .backends import build_posture_grid, get_backend, select_backend
+from .features import WINDOW_FEATURES
+from .prediction_cache import QuantizedLRUCache
+from .registry import ModelBundle, ModelRegistry, load_model_file
+
+# Default number of rows passed to a single predict_proba call in batch mode
+DEFAULT_BATCH_CHUNK_SIZE = 50000
+
+# Column order of the float32 sensor rows taken by analyze_sample / analyze_samples
+SENSOR_CHANNELS = ('tilt_x', 'tilt_y', 'gyro_x', 'gyro_y', 'gyro_z')
+POSTURE_COLUMNS = slice(0, 2)
+FALL_COLUMNS = slice(2, 5)
+
+
+class SampleAnalysis(namedtuple('SampleAnalysis', ('is_correct', 'posture_confidence', 'is_fall', 'fall_confidence'))):
+    """
+    Posture and fall outcome from analyze_sample (scalars) or analyze_samples
+    (arrays); a model's fields are None when it is missing, skipped or failed
+    """
+    
+    __slots__ = ()
+    
+    @classmethod
+    def from_results(cls, posture_result, fall_result):
+        """Combine predict_posture / predict_fall result dicts"""
+        return cls(
+            posture_result['is_correct'] if posture_result else None,
+            posture_result['confidence'] if posture_result else None,
+            fall_result['is_fall'] if fall_result else None,
+            fall_result['confidence'] if fall_result else None,
+        )
+
+
+def sensor_row(sensor_data, out=None):
+    """
+    Fill out (or a new float32 row) from a sensor_data dict in SENSOR_CHANNELS
+    order; missing channels read as 0
+    """
+    if out is None:
+        out = np.empty(len(SENSOR_CHANNELS), dtype=np.float32)
+    for i, channel in enumerate(SENSOR_CHANNELS):
+        out[i] = sensor_data.get(channel, 0)
+    return out
+
+
+def sensor_matrix(samples):
+    """(n, 5) float32 matrix from a list of sensor_data dicts, in SENSOR_CHANNELS order"""
+    return np.array(
+        [[sample.get(channel, 0) for channel in SENSOR_CHANNELS] for sample in samples],
+        dtype=np.float32,
+    ).reshape(len(samples), len(SENSOR_CHANNELS))
+
+
+def _batch_chunk_size():
+    return getattr(settings, 'ML_BATCH_CHUNK_SIZE', DEFAULT_BATCH_CHUNK_SIZE)
+
+
+def _inference_backend():
+    return getattr(settings, 'ML_INFERENCE_BACKEND', 'sklearn')
+
+
+def _classify(model, features):
+    """
+    Classify a single row
+    Returns: (label, confidence)
+    """
+    if not hasattr(model, 'predict_proba'):
+        # Model doesn't have predict_proba method
+        prediction = model.predict(features)[0]
+        return prediction, 1.0 if prediction else 0.0
+    
+    probability = model.predict_proba(features)[0]
+    # Derive the label the way predict() does instead of a second model call
+    return model.classes_[np.argmax(probability)], float(max(probability))
+
+
+def _tilt_matrix(data_list):
+    """Build one contiguous float array of (tilt_x, tilt_y) rows from batch data"""
+    features = np.empty((len(data_list), 2), dtype=np.float64)
+    for i, data in enumerate(data_list):
+        features[i, 0] = data['tilt_x']
+        features[i, 1] = data['tilt_y']
+    return features
+
+
+def _predict_labels_batch(model, features, chunk_size):
+    """
+    Run predict_proba over features in chunks of chunk_size rows
+    Returns: (labels, confidences) arrays derived from the probabilities
+    """
+    if not hasattr(model, 'predict_proba'):
+        labels = model.predict(features)
+        return labels, labels.astype(bool).astype(np.float64)
+    
+    classes = model.classes_
+    labels = np.empty(len(features), dtype=classes.dtype)
+    confidences = np.empty(len(features), dtype=np.float64)
+    
+    for start in range(0, len(features), chunk_size):
+        stop = start + chunk_size
+        probability = model.predict_proba(features[start:stop])
+        # Same rule sklearn classifiers use for predict()
+        labels[start:stop] = classes.take(np.argmax(probability, axis=1))
+        confidences[start:stop] = probability.max(axis=1)
+    
+    return labels, confidences
 
 class PostureAnalyzer:
-    def __init__(self):
-        self.posture_model = None
-        self.fall_model = None
-        self.load_models()
+    def __init__(self, backend=None, lazy=None):
+        # 'auto' benchmarks the candidate backends on every loaded model version
+        self.backend = backend or _inference_backend()
+        if self.backend != 'auto':
+            get_backend(self.backend)
+        self.registry = ModelRegistry(
+            settings.ML_MODELS_DIR,
+            self.build_bundle,
+            poll_interval=getattr(settings, 'ML_MODEL_RELOAD_INTERVAL', 0),
+        )
+        # Opt-in memoization of real-time posture predictions
+        self.posture_cache = None
+        if getattr(settings, 'POSTURE_CACHE_SIZE', 0) > 0:
+            self.posture_cache = QuantizedLRUCache(
+                max_size=settings.POSTURE_CACHE_SIZE,
+                resolution=getattr(settings, 'POSTURE_CACHE_RESOLUTION', 0.1),
+            )
+        if lazy is None:
+            lazy = getattr(settings, 'ML_MODELS_LAZY', True)
+        # Lazy analyzers load on the first prediction, so importing this module
+        # from manage.py commands, migrations and tests stays cheap
+        if not lazy:
+            self.load_models()
     
     def load_models(self):
-        try:
-            posture_model_path = os.path.join(settings.ML_MODELS_DIR, 'posture_model.pkl')
-            fall_model_path = os.path.join(settings.ML_MODELS_DIR, 'fall_detection_model.pkl')
-            
-            if os.path.exists(posture_model_path):
-                self.posture_model = joblib.load(posture_model_path)
-            if os.path.exists(fall_model_path):
-                self.fall_model = joblib.load(fall_model_path)
-                
-        except Exception as e:
-            print(f"Error loading models: {e}")
+        self.registry.ensure_loaded()
+    
+    @property
+    def posture_model(self):
+        self.registry.ensure_loaded()
+        return self.registry.current.posture_model
+    
+    @property
+    def fall_model(self):
+        self.registry.ensure_loaded()
+        return self.registry.current.fall_model
+    
+    @property
+    def model_versions(self):
+        """Version of every model kind in the active bundle"""
+        self.registry.ensure_loaded()
+        return self.registry.current.versions
+    
+    def backend_stats(self):
+        """Configured and active inference backend, without forcing a model load"""
+        bundle = self.registry.current
+        return {
+            'configured': self.backend,
+            'active': bundle.backend,
+            'auto_selection': bundle.backend_report,
+        }
+    
+    def build_bundle(self, model_files):
+        """Load the given model files and prepare them for the configured backend"""
+        paths = {kind: path for kind, (_, path, _) in model_files.items()}
+        # mmap_mode='r' maps the pickled NumPy arrays read-only so worker
+        # processes share their pages instead of each holding a private copy
+        mmap_mode = getattr(settings, 'ML_MODELS_MMAP_MODE', None)
+        bundle = ModelBundle(
+            model_files,
+            posture_model=load_model_file(paths['posture'], mmap_mode) if 'posture' in paths else None,
+            fall_model=load_model_file(paths['fall'], mmap_mode) if 'fall' in paths else None,
+        )
+        
+        if self.backend == 'auto':
+            bundle = select_backend(
+                bundle,
+                paths,
+                self._evaluate_posture,
+                getattr(settings, 'ML_AUTO_BACKEND_CANDIDATES', ('sklearn', 'compiled', 'grid')),
+            )
+        else:
+            get_backend(self.backend).prepare(bundle, paths)
+            bundle.backend = self.backend
+        if getattr(settings, 'POSTURE_GRID_ENABLED', False) and bundle.posture_grid is None:
+            build_posture_grid(bundle)
+        return bundle
     
     def predict_posture(self, tilt_x, tilt_y):
         """
         Predict if posture is correct based on tilt sensor data
         Returns: True if correct posture, False if incorrect
         """
-        if not self.posture_model:
+        with self.registry.use() as bundle:
+            return self._predict_posture(bundle, tilt_x, tilt_y)
+    
+    def _predict_posture(self, bundle, tilt_x, tilt_y):
+        if not bundle.posture_model:
             return None
         
         try:
-            # Create a list of lists instead of numpy array
-            features = [[tilt_x, tilt_y]]
-            prediction = self.posture_model.predict(features)[0]
-            probability = self.posture_model.predict_proba(features)[0]
+            if self.posture_cache is None:
+                return self._evaluate_posture(bundle, tilt_x, tilt_y)
             
-            return {
-                'is_correct': bool(prediction),
-                'confidence': float(max(probability))
-            }
+            # Near-identical readings share one prediction made at the
+            # centre of their quantization cell
+            key = self.posture_cache.quantize(tilt_x, tilt_y)
+            cached = self.posture_cache.get(bundle, key)
+            if cached is not None:
+                return dict(cached)
+            result = self._evaluate_posture(bundle, *self.posture_cache.point(key))
+            self.posture_cache.put(bundle, key, dict(result))
+            return result
         except Exception as e:
             print(f"Error predicting posture: {e}")
             return None
     
+    def _evaluate_posture(self, bundle, tilt_x, tilt_y):
+        """Grid lookup, falling back to the bundle's posture model; raises on bad input"""
+        # O(1) answer when the reading falls in a cell with no decision boundary
+        if bundle.posture_grid is not None:
+            cell = bundle.posture_grid.lookup(float(tilt_x), float(tilt_y))
+            if cell is not None:
+                return {
+                    'is_correct': bool(cell[0]),
+                    'confidence': cell[1]
+                }
+        
+        # Create a list of lists instead of numpy array
+        prediction, confidence = _classify(bundle.posture_model, [[tilt_x, tilt_y]])
+        return {
+            'is_correct': bool(prediction),
+            'confidence': confidence
+        }
+    
     def predict_fall(self, gyro_x, gyro_y, gyro_z):
         """
         Predict if a fall has occurred based on gyroscope data
         Returns: True if fall detected, False otherwise
         """
-        if not self.fall_model:
+        with self.registry.use() as bundle:
+            return self._predict_fall(bundle, gyro_x, gyro_y, gyro_z)
+    
+    def _predict_fall(self, bundle, gyro_x, gyro_y, gyro_z):
+        # Create a list of lists instead of numpy array
+        return self._classify_fall(bundle, [[gyro_x, gyro_y, gyro_z]])
+    
+    def predict_fall_window(self, window):
+        """
+        Predict a fall from a FallFeatureWindow
+        Models trained on window features get the window's feature vector; models
+        trained on raw (gyro_x, gyro_y, gyro_z) samples get its peak sample
+        """
+        with self.registry.use() as bundle:
+            if not bundle.fall_model:
+                return None
+            if bundle.fall_model.n_features_in_ == len(WINDOW_FEATURES):
+                return self._classify_fall(bundle, [window.features()])
+            return self._classify_fall(bundle, [window.peak_sample])
+    
+    def _classify_fall(self, bundle, features):
+        if not bundle.fall_model:
             return None
         
         try:
-            # Create a list of lists instead of numpy array
-            features = [[gyro_x, gyro_y, gyro_z]]
-            prediction = self.fall_model.predict(features)[0]
-            probability = self.fall_model.predict_proba(features)[0]
+            prediction, confidence = _classify(bundle.fall_model, features)
             
             return {
                 'is_fall': bool(prediction),
-                'confidence': float(max(probability))
+                'confidence': confidence
             }
         except Exception as e:
             print(f"Error predicting fall: {e}")
             return None
     
-    def analyze_batch_data(self, data_list):
+    def predict_posture_batch(self, features, chunk_size=None):
         """
-        Analyze batch data for offline mode
-        data_list: list of dictionaries with tilt_x, tilt_y values
+        Predict posture for a (n, 2) array of tilt_x, tilt_y rows
+        Returns: list of result dicts, one per row, matching predict_posture
         """
-        results = []
-        correct_count = 0
-        
-        for data in data_list:
-            posture_result = self.predict_posture(data['tilt_x'], data['tilt_y'])
-            if posture_result and posture_result['is_correct']:
-                correct_count += 1
-            results.append(posture_result)
-        
-        # Calculate percentage using basic arithmetic
-        total_samples = len(data_list)
-        correctness_percentage = (correct_count / total_samples) * 100 if total_samples > 0 else 0
-        
-        return {
-            'results': results,
-            'correctness_percentage': correctness_percentage,
-            'total_samples': total_samples,
-            'correct_samples': correct_count
-        }
-
-# Alternative implementation if joblib models don't work with Python lists
-class SimplePostureAnalyzer:
-    def __init__(self):
-        self.posture_model = None
-        self.fall_model = None
-        self.load_models()
-    
-    def load_models(self):
-        try:
-            posture_model_path = os.path.join(settings.ML_MODELS_DIR, 'posture_model.pkl')
-            fall_model_path = os.path.join(settings.ML_MODELS_DIR, 'fall_detection_model.pkl')
+        with self.registry.use() as bundle:
+            if not bundle.posture_model:
+                return [None] * len(features)
+            if len(features) == 0:
+                return []
             
-            if os.path.exists(posture_model_path):
-                self.posture_model = joblib.load(posture_model_path)
-            if os.path.exists(fall_model_path):
-                self.fall_model = joblib.load(fall_model_path)
-                
-        except Exception as e:
-            print(f"Error loading models: {e}")
-    
-    def _convert_to_model_input(self, data):
-        """Convert Python list to format expected by the model"""
-        try:
-            # If the model was trained with numpy, we might need to use array-like structure
-            # Most scikit-learn models accept list of lists
-            return data
-        except Exception:
-            # If that fails, you might need a different approach
-            return data
+            chunk_size = chunk_size or _batch_chunk_size()
+            try:
+                labels, confidences = _predict_labels_batch(bundle.posture_model, features, chunk_size)
+            except Exception as e:
+                # Fall back to the per-row path so a single bad row only loses itself
+                print(f"Error predicting posture batch, retrying per row: {e}")
+                return [self._predict_posture(bundle, tilt_x, tilt_y) for tilt_x, tilt_y in features.tolist()]
+        
+        return [
+            {'is_correct': bool(label), 'confidence': confidence}
+            for label, confidence in zip(labels.tolist(), confidences.tolist())
+        ]
     
-    def predict_posture(self, tilt_x, tilt_y):
+    def predict_fall_batch(self, features, chunk_size=None):
         """
-        Predict if posture is correct based on tilt sensor data
-        Returns: True if correct posture, False if incorrect
+        Predict falls for a (n, 3) array of gyro_x, gyro_y, gyro_z rows
+        Returns: list of result dicts, one per row, matching predict_fall
         """
-        if not self.posture_model:
-            return None
-        
-        try:
-            features = self._convert_to_model_input([[float(tilt_x), float(tilt_y)]])
-            prediction = self.posture_model.predict(features)[0]
+        with self.registry.use() as bundle:
+            if not bundle.fall_model:
+                return [None] * len(features)
+            if len(features) == 0:
+                return []
             
-            # Handle probability prediction
+            chunk_size = chunk_size or _batch_chunk_size()
             try:
-                probability = self.posture_model.predict_proba(features)[0]
-                confidence = float(max(probability))
-            except AttributeError:
-                # Model doesn't have predict_proba method
-                confidence = 1.0 if prediction else 0.0
-            
-            return {
-                'is_correct': bool(prediction),
-                'confidence': confidence
-            }
-        except Exception as e:
-            print(f"Error predicting posture: {e}")
-            return None
+                labels, confidences = _predict_labels_batch(bundle.fall_model, features, chunk_size)
+            except Exception as e:
+                print(f"Error predicting fall batch, retrying per row: {e}")
+                return [
+                    self._predict_fall(bundle, gyro_x, gyro_y, gyro_z)
+                    for gyro_x, gyro_y, gyro_z in features.tolist()
+                ]
+        
+        return [
+            {'is_fall': bool(label), 'confidence': confidence}
+            for label, confidence in zip(labels.tolist(), confidences.tolist())
+        ]
     
-    def predict_fall(self, gyro_x, gyro_y, gyro_z):
+    def analyze_sample(self, row, posture=True, fall=True):
         """
-        Predict if a fall has occurred based on gyroscope data
-        Returns: True if fall detected, False otherwise
+        Run both models on one float32 row in SENSOR_CHANNELS order
+        posture / fall: False skips that model, e.g. when a fast path or gate already decided
+        Returns: SampleAnalysis of Python scalars
         """
-        if not self.fall_model:
-            return None
+        analysis = self.analyze_samples(row[np.newaxis, :], posture=posture, fall=fall)
+        return SampleAnalysis(*(None if field is None else field[0].item() for field in analysis))
+    
+    def analyze_samples(self, samples, posture=True, fall=True, chunk_size=None):
+        """
+        Run both models on an (n, 5) float32 matrix in SENSOR_CHANNELS order;
+        each model reads its own columns of the shared matrix without copying
+        Returns: SampleAnalysis of arrays
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        chunk_size = chunk_size or _batch_chunk_size()
+        is_correct = posture_confidence = is_fall = fall_confidence = None
         
+        with self.registry.use() as bundle:
+            if posture and bundle.posture_model:
+                is_correct, posture_confidence = self._analyze_posture(bundle, samples[:, POSTURE_COLUMNS], chunk_size)
+            if fall and bundle.fall_model:
+                is_fall, fall_confidence = self._analyze_columns(
+                    bundle.fall_model, samples[:, FALL_COLUMNS], chunk_size)
+        
+        return SampleAnalysis(is_correct, posture_confidence, is_fall, fall_confidence)
+    
+    def _analyze_posture(self, bundle, features, chunk_size):
+        if self.posture_cache is None:
+            return self._analyze_columns(bundle.posture_model, features, chunk_size, bundle.posture_grid)
+        
+        # Same memoization as _predict_posture: every reading is answered at the
+        # centre of its quantization cell, and each missing cell is evaluated once
         try:
-            features = self._convert_to_model_input([[float(gyro_x), float(gyro_y), float(gyro_z)]])
-            prediction = self.fall_model.predict(features)[0]
-            
-            # Handle probability prediction
-            try:
-                probability = self.fall_model.predict_proba(features)[0]
-                confidence = float(max(probability))
-            except AttributeError:
-                # Model doesn't have predict_proba method
-                confidence = 1.0 if prediction else 0.0
-            
-            return {
-                'is_fall': bool(prediction),
-                'confidence': confidence
-            }
+            keys = [self.posture_cache.quantize(tilt_x, tilt_y) for tilt_x, tilt_y in features.tolist()]
+        except (TypeError, ValueError, OverflowError) as e:
+            print(f"Error quantizing posture samples, skipping the cache: {e}")
+            return self._analyze_columns(bundle.posture_model, features, chunk_size, bundle.posture_grid)
+        
+        labels = np.empty(len(keys), dtype=bool)
+        confidences = np.empty(len(keys), dtype=np.float64)
+        missing = {}
+        for i, key in enumerate(keys):
+            cached = self.posture_cache.get(bundle, key) if key not in missing else None
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                labels[i] = cached['is_correct']
+                confidences[i] = cached['confidence']
+        
+        if missing:
+            points = np.array([self.posture_cache.point(key) for key in missing], dtype=np.float64)
+            point_labels, point_confidences = self._analyze_columns(
+                bundle.posture_model, points, chunk_size, bundle.posture_grid)
+            if point_labels is None:
+                return None, None
+            for (key, rows), label, confidence in zip(missing.items(), point_labels.tolist(), point_confidences.tolist()):
+                self.posture_cache.put(bundle, key, {'is_correct': label, 'confidence': confidence})
+                labels[rows] = label
+                confidences[rows] = confidence
+        return labels, confidences
+    
+    def _analyze_columns(self, model, features, chunk_size, grid=None):
+        try:
+            if grid is None:
+                labels, confidences = _predict_labels_batch(model, features, chunk_size)
+            else:
+                # Exact grid cells answer directly; only the rest reach the model
+                labels, confidences, hit = grid.lookup_many(features)
+                miss = ~hit
+                if miss.any():
+                    labels[miss], confidences[miss] = _predict_labels_batch(model, features[miss], chunk_size)
+            return labels.astype(bool), confidences
         except Exception as e:
-            print(f"Error predicting fall: {e}")
-            return None
+            print(f"Error analyzing samples: {e}")
+            return None, None
     
-    def analyze_batch_data(self, data_list):
+    def analyze_batch_data(self, data_list, chunk_size=None):
         """
         Analyze batch data for offline mode
         data_list: list of dictionaries with tilt_x, tilt_y values
         """
-        results = []
-        correct_count = 0
-        
-        for data in data_list:
-            posture_result = self.predict_posture(data['tilt_x'], data['tilt_y'])
-            if posture_result and posture_result['is_correct']:
-                correct_count += 1
-            results.append(posture_result)
+        results = self.predict_posture_batch(_tilt_matrix(data_list), chunk_size)
+        correct_count = sum(1 for result in results if result and result['is_correct'])
         
+        # Calculate percentage using basic arithmetic
         total_samples = len(data_list)
         correctness_percentage = (correct_count / total_samples) * 100 if total_samples > 0 else 0
         
@@ -200,5 +422,16 @@ class SimplePostureAnalyzer:
             'correct_samples': correct_count
         }
 
+# Reference analyzer for benchmarks and backend comparisons
+class SimplePostureAnalyzer(PostureAnalyzer):
+    """
+    Eagerly loaded analyzer on the plain 'sklearn' backend (no compiled trees,
+    grid or process pool); an exported .npz model file is still evaluated by
+    CompiledForest
+    """
+    
+    def __init__(self):
+        super().__init__(backend='sklearn', lazy=False)
+
 # Global analyzer instance
 posture_analyzer = PostureAnalyzer()
\ No newline at end of file
@@ -12,6 +12,10 @@ class UserProfile(models.Model):
     device_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     is_device_connected = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Upright (tilt_x, tilt_y) baseline recorded in calibration mode
+    posture_baseline_mean = models.JSONField(null=True, blank=True)
+    posture_baseline_covariance = models.JSONField(null=True, blank=True)
+    posture_calibrated_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
@@ -48,4 +52,39 @@ class EmergencyAlert(models.Model):
     ])
     timestamp = models.DateTimeField(default=timezone.now)
     is_resolved = models.BooleanField(default=False)
-    emergency_contact_notified = models.BooleanField(default=False)
\ No newline at end of file
+    emergency_contact_notified = models.BooleanField(default=False)
+    # Fall incidents: positive samples attached to this alert, the latest of
+    # them, and whether (and why) no call was made for it
+    fall_samples = models.IntegerField(default=1)
+    last_detected_at = models.DateTimeField(null=True, blank=True)
+    notification_suppressed = models.BooleanField(default=False)
+    suppression_reason = models.CharField(max_length=20, blank=True, choices=[
+        ('cooldown', 'Recent Fall Already Notified'),
+        ('no_contact', 'No Emergency Contact')
+    ])
+
+class AlertOutbox(models.Model):
+    """One emergency notification waiting for (or done with) delivery by the alert dispatcher"""
+    alert = models.ForeignKey(EmergencyAlert, on_delete=models.CASCADE, related_name='outbox')
+    channel = models.CharField(max_length=10, choices=[
+        ('sms', 'SMS'),
+        ('call', 'Voice Call')
+    ])
+    to_number = models.CharField(max_length=15)
+    body = models.TextField()
+    # One delivery per alert and channel, however often it is enqueued
+    dedup_key = models.CharField(max_length=100, unique=True)
+    status = models.CharField(max_length=10, default='pending', choices=[
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed')
+    ])
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    provider_sid = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
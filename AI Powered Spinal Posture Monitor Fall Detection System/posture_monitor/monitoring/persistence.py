@@ -0,0 +1,269 @@
+import asyncio
+import time
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from .metrics import Histogram
+from .models import PostureData
+
+
+class WriteStats:
+    """Process-wide counters for every PostureWriteBuffer"""
+
+    def __init__(self):
+        self.flushes = 0
+        self.rows = 0
+        self.failed_rows = 0
+        self.flush_size_histogram = Histogram((1, 5, 10, 25, 50, 100, 250, 500))
+        self.flush_latency_histogram = Histogram((1, 2, 5, 10, 20, 50, 100, 250, 1000))
+
+    def record(self, rows, latency_ms, ok):
+        self.flushes += 1
+        if ok:
+            self.rows += rows
+        else:
+            self.failed_rows += rows
+        self.flush_size_histogram.observe(rows)
+        self.flush_latency_histogram.observe(latency_ms)
+
+    def snapshot(self):
+        return {
+            'flushes': self.flushes,
+            'rows': self.rows,
+            'failed_rows': self.failed_rows,
+            'flush_size': self.flush_size_histogram.snapshot(),
+            'flush_latency_ms': self.flush_latency_histogram.snapshot(),
+        }
+
+
+write_stats = WriteStats()
+
+
+@database_sync_to_async
+def bulk_create_posture_data(rows):
+    PostureData.objects.bulk_create(rows)
+
+
+@database_sync_to_async
+def write_posture_batches(batches):
+    """Write several buffered batches in one transaction"""
+    with transaction.atomic():
+        for rows in batches:
+            PostureData.objects.bulk_create(rows)
+
+
+class PostureWriteBuffer:
+    """
+    Per-connection write-behind buffer for PostureData.
+
+    Rows are built in memory and written with one bulk_create when flush_size
+    rows are queued or the oldest has waited flush_interval_ms; close() (on
+    disconnect) writes whatever is left. At most max_pending_flushes writes
+    are in flight: a full buffer makes add() wait for one to finish, so a
+    slow database (or a blocking IngestionWriter) slows the connection down
+    instead of piling up flush tasks.
+    """
+
+    def __init__(self, flush_size=50, flush_interval_ms=1000.0, writer=bulk_create_posture_data, stats=write_stats,
+                 max_pending_flushes=2):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.writer = writer
+        self.stats = stats
+        self.max_pending_flushes = max_pending_flushes
+        self._rows = []
+        self._timer = None
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def pending_flushes(self):
+        return len(self._tasks)
+
+    async def add(self, **fields):
+        """
+        Queue one PostureData row; its timestamp defaults to now, not to when it
+        is written. Waits while max_pending_flushes writes are in flight.
+        """
+        self._rows.append(PostureData(**fields))
+        if len(self._rows) >= self.flush_size:
+            while len(self._tasks) >= self.max_pending_flushes:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._schedule_flush)
+
+    def _take(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows = self._rows
+        self._rows = []
+        return rows
+
+    def _schedule_flush(self):
+        # Rows are taken now so later samples start the next batch
+        task = asyncio.get_running_loop().create_task(self._write(self._take()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        await self._write(self._take())
+
+    async def _write(self, rows):
+        if not rows:
+            return
+
+        started = time.perf_counter()
+        ok = True
+        try:
+            await self.writer(rows)
+        except Exception as e:
+            ok = False
+            print(f"Error saving {len(rows)} posture samples: {e}")
+        if self.stats is not None:
+            self.stats.record(len(rows), (time.perf_counter() - started) * 1000.0, ok)
+
+    async def close(self):
+        """Write every queued row and wait for in-flight flushes"""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class IngestionWriter:
+    """
+    Process-wide single writer for PostureData.
+
+    Connections submit row batches to one bounded asyncio.Queue; a background
+    task drains it and writes everything that arrived within flush_interval_ms
+    in a single transaction, so SQLite sees one writer instead of one per
+    connection. When the queue is full, policy decides what submit() does:
+    'block' waits for space (the consumer slows down), 'drop' discards the
+    batch and 'merge' appends it to the newest batch still queued, up to
+    max_merge_rows, before dropping.
+    """
+
+    POLICIES = ('block', 'drop', 'merge')
+
+    def __init__(self, max_queue=256, flush_interval_ms=200.0, policy='block', max_merge_rows=1000,
+                 writer=write_posture_batches):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown ingestion policy {policy!r}; choose one of {self.POLICIES}")
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.policy = policy
+        self.max_merge_rows = max_merge_rows
+        self.writer = writer
+        self._queue = None
+        self._task = None
+        self._loop = None
+        # Newest queued batch, while the writer has not taken it yet
+        self._tail = None
+
+        self.transactions = 0
+        self.rows_written = 0
+        self.failed_rows = 0
+        self.dropped_rows = 0
+        self.merged_rows = 0
+        self.blocked = 0
+        self.max_depth = 0
+        self.depth_histogram = Histogram((0, 1, 2, 5, 10, 25, 50, 100, 250))
+        self.block_wait_histogram = Histogram((1, 5, 10, 50, 100, 500, 1000))
+        self.transaction_latency_histogram = Histogram((1, 2, 5, 10, 20, 50, 100, 250, 1000))
+
+    def _ensure_started(self):
+        # The queue and task belong to the running loop; restart them if it changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._tail = None
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, rows):
+        """Queue a batch of unsaved PostureData rows according to policy"""
+        if not rows:
+            return
+        self._ensure_started()
+        depth = self._queue.qsize()
+        self.depth_histogram.observe(depth)
+        self.max_depth = max(self.max_depth, depth)
+
+        if not self._queue.full():
+            self._enqueue(rows)
+        elif self.policy == 'block':
+            self.blocked += 1
+            started = time.perf_counter()
+            await self._queue.put(rows)
+            self._tail = rows
+            self.block_wait_histogram.observe((time.perf_counter() - started) * 1000.0)
+        elif self.policy == 'merge' and self._tail is not None and len(self._tail) + len(rows) <= self.max_merge_rows:
+            self._tail.extend(rows)
+            self.merged_rows += len(rows)
+        else:
+            self.dropped_rows += len(rows)
+
+    def _enqueue(self, rows):
+        self._queue.put_nowait(rows)
+        self._tail = rows
+
+    async def _run(self):
+        while True:
+            batches = [await self._queue.get()]
+            # Let the rest of the flush interval fill the queue, then write it all at once
+            await asyncio.sleep(self.flush_interval)
+            while not self._queue.empty():
+                batches.append(self._queue.get_nowait())
+            # Everything queued is about to be written; nothing left to merge into
+            self._tail = None
+
+            await self._write(batches)
+            for _ in batches:
+                self._queue.task_done()
+
+    async def _write(self, batches):
+        rows = sum(len(batch) for batch in batches)
+        started = time.perf_counter()
+        try:
+            await self.writer(batches)
+            self.rows_written += rows
+        except Exception as e:
+            self.failed_rows += rows
+            print(f"Error saving {rows} posture samples: {e}")
+        self.transactions += 1
+        self.transaction_latency_histogram.observe((time.perf_counter() - started) * 1000.0)
+
+    async def join(self):
+        """Wait until every submitted batch has been written"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue': self.max_queue,
+            'max_depth': self.max_depth,
+            'depth': self.depth_histogram.snapshot(),
+            'transactions': self.transactions,
+            'rows_written': self.rows_written,
+            'failed_rows': self.failed_rows,
+            'dropped_rows': self.dropped_rows,
+            'merged_rows': self.merged_rows,
+            'blocked': self.blocked,
+            'block_wait_ms': self.block_wait_histogram.snapshot(),
+            'transaction_latency_ms': self.transaction_latency_histogram.snapshot(),
+        }
+
+
+ingestion_writer = IngestionWriter(
+    max_queue=getattr(settings, 'POSTURE_INGESTION_QUEUE_SIZE', 256),
+    flush_interval_ms=getattr(settings, 'POSTURE_INGESTION_FLUSH_INTERVAL_MS', 200.0),
+    policy=getattr(settings, 'POSTURE_INGESTION_POLICY', 'block'),
+    max_merge_rows=getattr(settings, 'POSTURE_INGESTION_MAX_MERGE_ROWS', 1000),
+)
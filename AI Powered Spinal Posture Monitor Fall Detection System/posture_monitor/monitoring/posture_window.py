@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+
+
+class PostureWindow:
+    """
+    Time-bounded sliding window of posture outcomes for one connection.
+
+    Timestamps and outcomes live in fixed-size NumPy ring buffers with a
+    running count of incorrect samples; expired samples are dropped from the
+    head, so push() is O(1) amortized and memory is constant. Size capacity
+    for duration at the highest sample rate expected (for_rate()); beyond it
+    the oldest samples are evicted early. Timestamps older than the newest
+    sample (a device clock stepping back) are treated as the newest.
+    """
+
+    def __init__(self, duration=300.0, capacity=4096):
+        self.duration = duration
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._correct = np.zeros(capacity, dtype=bool)
+        self._head = 0
+        self._count = 0
+        self.incorrect_count = 0
+
+    @classmethod
+    def for_rate(cls, duration=300.0, max_rate_hz=100.0):
+        """Window with room for duration seconds of samples at max_rate_hz"""
+        return cls(duration=duration, capacity=int(duration * max_rate_hz) + 1)
+
+    def __len__(self):
+        return self._count
+
+    def _pop_head(self):
+        if not self._correct[self._head]:
+            self.incorrect_count -= 1
+        self._head = (self._head + 1) % self.capacity
+        self._count -= 1
+
+    def push(self, is_correct, timestamp=None):
+        """Add one outcome at timestamp (seconds, time.monotonic() by default)"""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self._count:
+            timestamp = max(timestamp, self._timestamps[(self._head + self._count - 1) % self.capacity])
+
+        # Keep only the last duration seconds of data
+        while self._count and timestamp - self._timestamps[self._head] > self.duration:
+            self._pop_head()
+        if self._count == self.capacity:
+            self._pop_head()
+
+        tail = (self._head + self._count) % self.capacity
+        self._timestamps[tail] = timestamp
+        self._correct[tail] = bool(is_correct)
+        self._count += 1
+        if not is_correct:
+            self.incorrect_count += 1
+
+    @property
+    def incorrect_percentage(self):
+        return (self.incorrect_count / self._count) * 100 if self._count else 0.0
+
+    @property
+    def span(self):
+        """Seconds between the oldest and newest sample in the window"""
+        if not self._count:
+            return 0.0
+        newest = self._timestamps[(self._head + self._count - 1) % self.capacity]
+        return float(newest - self._timestamps[self._head])
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+
+class QuantizedLRUCache:
+    """
+    Bounded LRU cache of predictions keyed on inputs quantized to resolution.
+
+    Entries are tagged with the model bundle that produced them; the first
+    lookup made with a different bundle clears the cache, so a model swap
+    invalidates it automatically.
+    """
+
+    def __init__(self, max_size=4096, resolution=0.1):
+        self.max_size = max_size
+        self.resolution = resolution
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._owner = None
+        self._lock = threading.Lock()
+
+    def quantize(self, *values):
+        """Cache key for a reading; raises ValueError/TypeError for non-numeric input"""
+        return tuple(round(float(value) / self.resolution) for value in values)
+
+    def point(self, key):
+        """Representative input of a key's quantization cell"""
+        return [step * self.resolution for step in key]
+
+    def _check_owner(self, owner):
+        if owner is not self._owner:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._owner = owner
+
+    def get(self, owner, key):
+        with self._lock:
+            self._check_owner(owner)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, owner, key, value):
+        with self._lock:
+            self._check_owner(owner)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'resolution': self.resolution,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,337 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from .compiled_trees import compile_estimator
+from .registry import load_model_file
+
+MODEL_KINDS = ('posture', 'fall')
+
+# Widest feature row and probability row a slot can hold
+MAX_FEATURES = 8
+MAX_CLASSES = 8
+
+
+def _slot_views(buffer, slots, slot_rows):
+    """Map the shared block onto per-slot input and output arrays"""
+    input_size = slots * slot_rows * MAX_FEATURES
+    inputs = np.ndarray((slots, slot_rows, MAX_FEATURES), dtype=np.float64, buffer=buffer)
+    outputs = np.ndarray(
+        (slots, slot_rows, MAX_CLASSES), dtype=np.float64, buffer=buffer, offset=input_size * 8
+    )
+    return inputs, outputs
+
+
+def _worker_main(shm_name, slots, slot_rows, model_paths, conn):
+    """Worker process: load each model once, then serve slot requests until told to stop"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    inputs, outputs = _slot_views(shm.buf, slots, slot_rows)
+    try:
+        _serve(inputs, outputs, model_paths, conn)
+    finally:
+        # The views must be released before the block can be closed
+        del inputs, outputs
+        shm.close()
+        conn.close()
+
+
+def _serve(inputs, outputs, model_paths, conn):
+    models = {}
+    try:
+        for kind in MODEL_KINDS:
+            path = model_paths.get(kind)
+            if path and os.path.exists(path):
+                model = load_model_file(path)
+                # Tree ensembles are evaluated from flattened node tables when possible
+                models[kind] = compile_estimator(model) or model
+    except Exception as e:
+        # Tell the parent right away instead of letting it wait for 'ready'
+        conn.send(('error', f"{kind} model: {e}"))
+        return
+    conn.send(('ready', {
+        kind: (model.classes_.tolist(), int(model.n_features_in_)) for kind, model in models.items()
+    }))
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            # The parent is gone
+            break
+        if request is None:
+            break
+
+        slot, kind, n_rows, n_features = request
+        try:
+            probability = models[kind].predict_proba(inputs[slot, :n_rows, :n_features])
+            outputs[slot, :n_rows, :probability.shape[1]] = probability
+            conn.send((slot, None))
+        except Exception as e:
+            conn.send((slot, str(e)))
+
+
+class _Worker:
+    """Parent side of one worker process: its pipe and the slots it is working on"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.ready = False
+        self.dead = False
+        self.slots = set()
+        self.send_lock = threading.Lock()
+
+
+class ProcessPoolInference:
+    """
+    Persistent worker processes that each hold their own copy of the models.
+
+    Feature rows and probabilities travel through a ring of fixed-size slots in
+    one shared-memory block; only (slot, kind, rows) tuples cross each worker's
+    pipe, so requests are never pickled. Callers block on their slot's event,
+    which releases the GIL while the workers run on other cores. A worker that
+    dies fails the slots it held and is replaced by a fresh one.
+    """
+
+    def __init__(self, model_paths, workers=2, slots=16, slot_rows=4096, timeout=5.0, startup_timeout=60.0):
+        self.slots = slots
+        self.slot_rows = slot_rows
+        self.timeout = timeout
+        self.models = {}
+        self.restarts = 0
+        self._model_paths = model_paths
+        self._close_lock = threading.Lock()
+        self._closing = False
+        self._collector = None
+
+        size = slots * slot_rows * (MAX_FEATURES + MAX_CLASSES) * 8
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._inputs, self._outputs = _slot_views(self._shm.buf, slots, slot_rows)
+
+        self._free_slots = queue.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+        self._events = [threading.Event() for _ in range(slots)]
+        self._errors = [None] * slots
+        # Slots whose caller timed out; recycled once the late answer arrives
+        self._abandoned = set()
+        self._abandoned_lock = threading.Lock()
+
+        # Spawn keeps workers independent of the parent's event loop and DB connections
+        self._context = multiprocessing.get_context('spawn')
+        # Replaced rather than modified once running, so callers can read it without a lock
+        self._workers = []
+        self._next_worker = 0
+        try:
+            for _ in range(workers):
+                self._workers.append(self._start_worker())
+            self._wait_until_ready(startup_timeout)
+        except BaseException:
+            # Never leave workers or the shared block behind a failed start
+            self.close()
+            raise
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def _start_worker(self):
+        conn, worker_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self._shm.name, self.slots, self.slot_rows, self._model_paths, worker_conn),
+            daemon=True,
+        )
+        process.start()
+        # Only the worker holds its end now, so its exit shows up here as EOF
+        worker_conn.close()
+        return _Worker(process, conn)
+
+    def _wait_until_ready(self, startup_timeout):
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            pending = {worker.conn: worker for worker in self._workers if not worker.ready}
+            if not pending:
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Inference workers not ready within {startup_timeout}s")
+            for conn in wait(list(pending), timeout=0.5):
+                try:
+                    message, payload = conn.recv()
+                except EOFError:
+                    raise RuntimeError("Inference worker exited during startup")
+                if message == 'error':
+                    raise RuntimeError(f"Inference worker could not load the {payload}")
+                for kind, (classes, n_features) in payload.items():
+                    self.models[kind] = (np.asarray(classes), n_features)
+                pending[conn].ready = True
+
+    def _collect_results(self):
+        while not self._closing:
+            workers = {worker.conn: worker for worker in self._workers}
+            for conn in wait(list(workers), timeout=0.5):
+                worker = workers[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._replace_worker(worker)
+                    continue
+                if message[0] == 'ready':
+                    worker.ready = True
+                elif message[0] == 'error':
+                    # A replacement that cannot load the models is not started again
+                    print(f"Error restarting inference worker: {message[1]}")
+                    self._retire_worker(worker)
+                else:
+                    self._complete(message[0], message[1], worker)
+
+    def _retire_worker(self, worker):
+        """Stop dispatching to worker and fail every slot it still held"""
+        with worker.send_lock:
+            worker.dead = True
+            held = list(worker.slots)
+        self._workers = [other for other in self._workers if other is not worker]
+        worker.conn.close()
+        worker.process.join(timeout=1)
+        for slot in held:
+            self._complete(slot, f"Inference worker exited with code {worker.process.exitcode}", worker)
+
+    def _replace_worker(self, worker):
+        self._retire_worker(worker)
+        if self._closing:
+            return
+        self.restarts += 1
+        print(f"Inference worker exited with code {worker.process.exitcode}; starting a replacement")
+        try:
+            self._workers = self._workers + [self._start_worker()]
+        except Exception as e:
+            print(f"Error restarting inference worker: {e}")
+
+    def _complete(self, slot, error, worker=None):
+        with self._abandoned_lock:
+            if worker is not None:
+                worker.slots.discard(slot)
+            self._errors[slot] = error
+            self._events[slot].set()
+            if slot in self._abandoned:
+                self._abandoned.discard(slot)
+                self._free_slots.put(slot)
+
+    def _dispatch(self, slot, request):
+        """Send request to the next ready worker, or fail its slot if none can take it"""
+        workers = [worker for worker in self._workers if worker.ready]
+        if not workers:
+            self._complete(slot, "No inference worker is running")
+            return
+        worker = workers[self._next_worker % len(workers)]
+        self._next_worker += 1
+        with worker.send_lock:
+            if not worker.dead:
+                worker.slots.add(slot)
+                try:
+                    worker.conn.send(request)
+                    return
+                except OSError:
+                    worker.slots.discard(slot)
+        # It died after being picked; the collector replaces it
+        self._complete(slot, "Inference worker exited", worker)
+
+    def _acquire_slots(self, wanted):
+        # Block for the first slot only so concurrent callers can never deadlock
+        try:
+            slots = [self._free_slots.get(timeout=self.timeout)]
+        except queue.Empty:
+            raise TimeoutError(f"No free inference slot within {self.timeout}s")
+        while len(slots) < wanted:
+            try:
+                slots.append(self._free_slots.get_nowait())
+            except queue.Empty:
+                break
+        return slots
+
+    def predict_proba(self, kind, features):
+        classes, n_features = self.models[kind]
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim != 2 or features.shape[1] != n_features:
+            raise ValueError(f"Expected input of shape (n, {n_features}), got {features.shape}")
+
+        n_classes = len(classes)
+        probability = np.empty((len(features), n_classes), dtype=np.float64)
+        chunks = [(start, min(start + self.slot_rows, len(features)))
+                  for start in range(0, len(features), self.slot_rows)]
+
+        while chunks:
+            slots = self._acquire_slots(min(len(chunks), max(len(self._workers), 1)))
+            wave, chunks = chunks[:len(slots)], chunks[len(slots):]
+            try:
+                for slot, (start, stop) in zip(slots, wave):
+                    self._inputs[slot, :stop - start, :n_features] = features[start:stop]
+                    self._errors[slot] = None
+                    self._events[slot].clear()
+                    self._dispatch(slot, (slot, kind, stop - start, n_features))
+
+                for slot, (start, stop) in zip(slots, wave):
+                    if not self._events[slot].wait(self.timeout):
+                        raise TimeoutError(f"Inference worker did not answer within {self.timeout}s")
+                    if self._errors[slot]:
+                        raise RuntimeError(self._errors[slot])
+                    probability[start:stop] = self._outputs[slot, :stop - start, :n_classes]
+            finally:
+                with self._abandoned_lock:
+                    for slot in slots:
+                        if self._events[slot].is_set():
+                            self._free_slots.put(slot)
+                        else:
+                            self._abandoned.add(slot)
+
+        return probability
+
+    def close(self):
+        with self._close_lock:
+            if self._shm is None:
+                return
+            atexit.unregister(self.close)
+            # Stop the collector first so stopping workers are not replaced
+            self._closing = True
+            if self._collector is not None:
+                self._collector.join()
+            for worker in self._workers:
+                with worker.send_lock:
+                    worker.dead = True
+                    try:
+                        worker.conn.send(None)
+                    except OSError:
+                        pass
+            for worker in self._workers:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join()
+                worker.conn.close()
+
+            self._inputs = self._outputs = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+class PooledModel:
+    """Estimator-like handle that evaluates one model kind in the process pool"""
+
+    def __init__(self, pool, kind):
+        self.pool = pool
+        self.kind = kind
+        self.classes_, self.n_features_in_ = pool.models[kind]
+
+    def predict_proba(self, X):
+        return self.pool.predict_proba(self.kind, X)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+# Channel layer message telling a user's live consumers to reload their profile
+PROFILE_CHANGED = {'type': 'profile.changed'}
+
+_PROFILE_FIELDS = (
+    'user_id',
+    'emergency_contact',
+    'device_id',
+    'is_device_connected',
+    'posture_baseline_mean',
+    'posture_baseline_covariance',
+    'posture_calibrated_at',
+)
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ProfileSnapshot(namedtuple('ProfileSnapshot', _PROFILE_FIELDS)):
+    """
+    Immutable copy of the UserProfile fields a PostureConsumer reads, loaded
+    once per connection and replaced when the profile changes
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_profile(cls, profile):
+        return cls(*(_freeze(getattr(profile, field)) for field in _PROFILE_FIELDS))
+
+
+def profile_group(user_id):
+    """Channel layer group of every live connection for a user"""
+    return f"profile_{user_id}"
+
+
+def notify_profile_changed(user_id):
+    """Tell the user's live consumers to reload their profile (from sync code such as views)"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(profile_group(user_id), PROFILE_CHANGED)
+    except Exception as e:
+        print(f"Error sending profile invalidation for {user_id}: {e}")
@@ -0,0 +1,81 @@
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from .ml_models import SENSOR_CHANNELS
+
+FRAME_MAGIC = b'PM'
+FRAME_VERSION = 1
+# Channels are scaled little-endian int16 instead of float32; one float32
+# scale per channel follows the header
+FLAG_INT16 = 0x01
+
+# magic, version, flags, device id (NUL padded), sequence, sample count,
+# channel count, padding, first sample Unix timestamp (0 = unknown), sample interval (s)
+FRAME_HEADER = struct.Struct('<2sBB16sIHBxdf')
+
+SensorFrame = namedtuple('SensorFrame', ('device_id', 'sequence', 'samples', 'timestamps'))
+
+
+class FrameError(ValueError):
+    """Malformed binary sensor frame"""
+
+
+def decode_frame(data):
+    """
+    Decode a binary sensor frame
+    Returns: SensorFrame whose samples is an (n, 5) float32 array in
+    SENSOR_CHANNELS order (a read-only view of data for float32 frames) and
+    timestamps an (n,) float64 array or None
+    """
+    if len(data) < FRAME_HEADER.size:
+        raise FrameError(f"Frame shorter than its {FRAME_HEADER.size}-byte header")
+    magic, version, flags, device_id, sequence, count, channels, timestamp, interval = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise FrameError(f"Unsupported frame {magic!r} version {version}")
+    if channels != len(SENSOR_CHANNELS):
+        raise FrameError(f"Expected {len(SENSOR_CHANNELS)} channels, got {channels}")
+
+    offset = FRAME_HEADER.size
+    if flags & FLAG_INT16:
+        scales = np.frombuffer(data, dtype='<f4', count=channels, offset=offset)
+        offset += scales.nbytes
+        dtype = np.dtype('<i2')
+    else:
+        dtype = np.dtype('<f4')
+
+    expected = offset + count * channels * dtype.itemsize
+    if len(data) != expected:
+        raise FrameError(f"Frame of {count} samples should be {expected} bytes, got {len(data)}")
+
+    samples = np.frombuffer(data, dtype=dtype, count=count * channels, offset=offset).reshape(count, channels)
+    if flags & FLAG_INT16:
+        samples = samples * scales
+    elif not dtype.isnative:
+        samples = samples.astype(np.float32)
+
+    timestamps = None
+    if timestamp:
+        timestamps = timestamp + np.arange(count) * float(interval)
+
+    return SensorFrame(device_id.rstrip(b'\0').decode('ascii', 'replace'), sequence, samples, timestamps)
+
+
+def encode_frame(device_id, sequence, samples, timestamp=0.0, interval=0.0, scales=None):
+    """
+    Build a binary sensor frame from an (n, 5) array (the device side of
+    decode_frame); scales selects the int16 encoding
+    """
+    samples = np.asarray(samples, dtype=np.float64).reshape(-1, len(SENSOR_CHANNELS))
+    flags = FLAG_INT16 if scales is not None else 0
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, flags, device_id.encode('ascii'), sequence,
+        len(samples), len(SENSOR_CHANNELS), timestamp, interval,
+    )
+    if scales is None:
+        return header + samples.astype('<f4').tobytes()
+
+    scales = np.asarray(scales, dtype='<f4')
+    raw = np.clip(np.round(samples / scales), -32768, 32767).astype('<i2')
+    return header + scales.tobytes() + raw.tobytes()
@@ -0,0 +1,197 @@
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import joblib
+
+from .compiled_trees import CompiledForest
+
+# Base file name of each model kind inside ML_MODELS_DIR
+MODEL_FILES = {
+    'posture': 'posture_model',
+    'fall': 'fall_detection_model',
+}
+
+# posture_model.pkl is version 0, posture_model.v3.npz is version 3
+VERSIONED_FILE_RE = re.compile(r'^(?P<base>[A-Za-z_]+?)(?:\.v(?P<version>\d+))?\.(?P<format>pkl|npz)$')
+
+# Model file formats in order of preference when a version exists in several:
+# 'npz' is the array export written by `manage.py export_models`, 'pkl' a joblib pickle
+MODEL_FORMATS = ('npz', 'pkl')
+
+
+def scan_model_files(models_dir, formats=MODEL_FORMATS):
+    """
+    Find the newest version of every model kind in models_dir, in the most
+    preferred of formats
+    Returns: {kind: (version, path, mtime)}
+    """
+    bases = {base: kind for kind, base in MODEL_FILES.items()}
+    found = {}
+    ranks = {}
+    try:
+        names = os.listdir(models_dir)
+    except OSError:
+        return found
+
+    for name in names:
+        match = VERSIONED_FILE_RE.match(name)
+        if not match or match.group('base') not in bases or match.group('format') not in formats:
+            continue
+        kind = bases[match.group('base')]
+        version = int(match.group('version') or 0)
+        rank = (version, -formats.index(match.group('format')))
+        if kind not in ranks or rank > ranks[kind]:
+            path = os.path.join(models_dir, name)
+            ranks[kind] = rank
+            found[kind] = (version, path, os.path.getmtime(path))
+
+    return found
+
+
+def load_model_file(path, mmap_mode=None):
+    """Load an exported .npz forest without sklearn, or unpickle anything else with joblib"""
+    if str(path).endswith('.npz'):
+        return CompiledForest.load(path)
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+class ModelBundle:
+    """
+    Models of one registry version, served together.
+
+    Callers hold a reference through ModelRegistry.use(); once the registry
+    retires a bundle it is closed as soon as the last in-flight user releases it.
+    """
+
+    def __init__(self, files=None, posture_model=None, fall_model=None):
+        self.files = files or {}
+        self.versions = {kind: version for kind, (version, _, _) in self.files.items()}
+        self.posture_model = posture_model
+        self.fall_model = fall_model
+        self.posture_grid = None
+        self.process_pool = None
+        # Name of the inference backend that prepared the models, plus the
+        # auto-selection measurements when ML_INFERENCE_BACKEND = 'auto'
+        self.backend = None
+        self.backend_report = None
+        self._refs = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self._refs += 1
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            close = self._retired and self._refs == 0
+        if close:
+            self.close()
+
+    def retire(self):
+        with self._lock:
+            self._retired = True
+            close = self._refs == 0
+        if close:
+            self.close()
+
+    def close(self):
+        """Free resources that outlive garbage collection (worker processes, shared memory)"""
+        if self.process_pool is not None:
+            self.process_pool.close()
+            self.process_pool = None
+
+
+class ModelRegistry:
+    """
+    Holds the active ModelBundle and hot-swaps it when newer model files appear.
+
+    A background thread polls models_dir every poll_interval seconds, builds the
+    new bundle off the request path with loader(files) and swaps it in with a
+    single reference assignment, so inference never pauses.
+    """
+
+    def __init__(self, models_dir, loader, poll_interval=0):
+        self.models_dir = models_dir
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self.current = ModelBundle()
+        self.loaded = False
+        self.last_load_seconds = None
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._failed_files = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def load(self):
+        """Load the newest model files now; returns True if a new bundle was swapped in"""
+        files = scan_model_files(self.models_dir)
+        if self.loaded and files == self.current.files:
+            return False
+        if files == self._failed_files:
+            return False
+
+        started = time.perf_counter()
+        try:
+            bundle = self.loader(files)
+        except Exception as e:
+            # Keep serving the current bundle and don't retry the same files every poll
+            print(f"Error loading models {sorted(path for _, path, _ in files.values())}: {e}")
+            self._failed_files = files
+            return False
+
+        self.last_load_seconds = time.perf_counter() - started
+        self.swap(bundle)
+        return True
+
+    def ensure_loaded(self):
+        """Load the models and start watching on first use rather than at import time"""
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self.load()
+            self.start_watching()
+            self._started = True
+
+    def swap(self, bundle):
+        with self._swap_lock:
+            previous = self.current
+            reloaded = self.loaded
+            self.current = bundle
+            self.loaded = True
+        previous.retire()
+        if reloaded:
+            print(f"Activated models {bundle.versions}")
+
+    @contextmanager
+    def use(self):
+        """Pin the active bundle for the duration of one prediction or batch"""
+        self.ensure_loaded()
+        with self._swap_lock:
+            bundle = self.current
+            bundle.acquire()
+        try:
+            yield bundle
+        finally:
+            bundle.release()
+
+    def start_watching(self):
+        if self.poll_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.load()
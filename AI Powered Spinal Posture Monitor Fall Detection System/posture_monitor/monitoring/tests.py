@@ -1,3 +1,1065 @@
-from django.test import TestCase
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import override_settings
 
 # Create your tests here.
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from .alerts import AlertDispatcher, enqueue_emergency_notifications
+from .backends import select_backend
+from .batching import InferenceBatcher
+from .benchmarks import compare_reports, prepare_models_dir, run_benchmarks
+from .calibration import BaselineClassifier, BaselineStats, CalibrationWindow
+from .compiled_trees import CompiledForest
+from .executor import InferenceExecutor, inference_executor
+from . import consumers
+from .consumers import PostureConsumer
+from .fall_gate import FallGate, GateStats, measure_gate_recall, save_replay_result
+from .features import FallFeatureWindow
+from .incidents import FallIncidentTracker
+from .lookup_grid import PostureLookupGrid
+from .models import AlertOutbox, EmergencyAlert, PostureData, UserProfile
+from .ml_models import PostureAnalyzer, SimplePostureAnalyzer, sensor_row
+from .persistence import IngestionWriter, PostureWriteBuffer, WriteStats
+from .posture_window import PostureWindow
+from .prediction_cache import QuantizedLRUCache
+from .process_pool import ProcessPoolInference
+from .profiles import profile_group
+from .protocol import FrameError, decode_frame, encode_frame
+from .registry import ModelBundle, ModelRegistry, load_model_file, scan_model_files
+from .throttle import UpdateThrottle
+
+
+class CompiledForestTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X_train = rng.uniform(-60, 60, size=(500, 3))
+        self.y_train = (self.X_train[:, 0] + 0.5 * self.X_train[:, 1] > 0).astype(int)
+        self.X_test = rng.uniform(-90, 90, size=(2000, 3))
+
+    def assert_parity(self, estimator):
+        compiled = CompiledForest.from_estimator(estimator)
+        np.testing.assert_allclose(compiled.predict_proba(self.X_test), estimator.predict_proba(self.X_test))
+        np.testing.assert_array_equal(compiled.predict(self.X_test), estimator.predict(self.X_test))
+
+    def test_random_forest_parity(self):
+        model = RandomForestClassifier(n_estimators=25, max_depth=6, random_state=0)
+        self.assert_parity(model.fit(self.X_train, self.y_train))
+
+    def test_npz_round_trip(self):
+        model = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0).fit(self.X_train, self.y_train)
+        path = os.path.join(tempfile.mkdtemp(), 'fall_detection_model.npz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        CompiledForest.from_estimator(model).save(path, source='test')
+
+        loaded = load_model_file(path)
+        self.assertEqual(loaded.metadata, {'source': 'test'})
+        np.testing.assert_array_equal(loaded.predict_proba(self.X_test), model.predict_proba(self.X_test))
+
+    def test_decision_tree_parity(self):
+        model = DecisionTreeClassifier(random_state=0)
+        self.assert_parity(model.fit(self.X_train, self.y_train))
+
+    def test_single_sample_list_input(self):
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(self.X_train, self.y_train)
+        compiled = CompiledForest.from_estimator(model)
+        sample = [[1.5, -2.0, 0.25]]
+        np.testing.assert_allclose(compiled.predict_proba(sample), model.predict_proba(sample))
+
+    def test_rejects_wrong_feature_count(self):
+        model = DecisionTreeClassifier(random_state=0).fit(self.X_train, self.y_train)
+        with self.assertRaises(ValueError):
+            CompiledForest.from_estimator(model).predict_proba([[1.0, 2.0]])
+
+
+class PostureLookupGridTests(SimpleTestCase):
+    def test_exact_cells_match_model(self):
+        rng = np.random.default_rng(1)
+        X_train = rng.uniform(-45, 45, size=(400, 2))
+        y_train = (X_train[:, 0] * X_train[:, 1] > 0).astype(int)
+        model = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0).fit(X_train, y_train)
+        grid = PostureLookupGrid(model, tilt_range=(-50.0, 50.0), resolution=1.0)
+
+        X_test = rng.uniform(-50, 50, size=(2000, 2))
+        probability = model.predict_proba(X_test)
+        hits = 0
+        for (tilt_x, tilt_y), proba in zip(X_test.tolist(), probability):
+            cell = grid.lookup(tilt_x, tilt_y)
+            if cell is None:
+                continue
+            hits += 1
+            self.assertEqual(cell, (model.classes_[np.argmax(proba)].item(), proba.max().item()))
+
+        self.assertGreater(hits, 0)
+
+    def test_out_of_range_falls_back(self):
+        model = DecisionTreeClassifier(random_state=0).fit([[0.0, 0.0], [10.0, 10.0]], [0, 1])
+        grid = PostureLookupGrid(model, tilt_range=(-20.0, 20.0), resolution=1.0)
+        self.assertIsNone(grid.lookup(25.0, 0.0))
+        self.assertIsNone(grid.lookup(float('nan'), 0.0))
+
+
+
+class RejectingModel:
+    """Wraps an estimator, records chunk sizes and rejects any chunk holding an infinite value"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        self.chunks = []
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        self.chunks.append(len(X))
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains infinity")
+        return self.model.predict_proba(X)
+
+
+class AnalyzeBatchDataTests(SimpleTestCase):
+    def setUp(self):
+        self.models_dir, _ = prepare_models_dir(force_synthetic=True)
+        self.addCleanup(shutil.rmtree, self.models_dir)
+        with override_settings(ML_MODELS_DIR=self.models_dir, ML_MODEL_RELOAD_INTERVAL=0):
+            self.analyzer = PostureAnalyzer(backend='sklearn', lazy=False)
+        self.model = self.analyzer.posture_model
+        self.data = [
+            {'tilt_x': tilt_x, 'tilt_y': tilt_y}
+            for tilt_x, tilt_y in np.random.default_rng(4).uniform(-90, 90, size=(130, 2)).tolist()
+        ]
+        # The per-row reference: one predict / predict_proba call per reading
+        self.expected = []
+        for data in self.data:
+            X = np.array([[data['tilt_x'], data['tilt_y']]])
+            self.expected.append({
+                'is_correct': bool(self.model.predict(X)[0]),
+                'confidence': float(self.model.predict_proba(X).max()),
+            })
+
+    def test_chunked_batch_matches_row_by_row(self):
+        rejecting = RejectingModel(self.model)
+        self.analyzer.registry.current.posture_model = rejecting
+        summary = self.analyzer.analyze_batch_data(self.data, chunk_size=50)
+
+        self.assertEqual(rejecting.chunks, [50, 50, 30])
+        self.assertEqual(summary['results'], self.expected)
+        self.assertEqual(summary['correct_samples'], sum(1 for result in self.expected if result['is_correct']))
+        self.assertEqual(summary['total_samples'], 130)
+
+    def test_failed_chunk_falls_back_per_row(self):
+        rejecting = RejectingModel(self.model)
+        self.analyzer.registry.current.posture_model = rejecting
+        data = self.data[:10] + [{'tilt_x': float('inf'), 'tilt_y': 0.0}] + self.data[10:20]
+        summary = self.analyzer.analyze_batch_data(data, chunk_size=8)
+
+        # Only the bad row loses its result
+        self.assertIsNone(summary['results'][10])
+        self.assertEqual(summary['results'][:10] + summary['results'][11:], self.expected[:20])
+        self.assertEqual(summary['total_samples'], 21)
+
+
+class RecordingAnalyzer:
+    """Stand-in analyzer that records the size of every batch it evaluates"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_posture_batch(self, features):
+        self.batches.append(len(features))
+        return [{'is_correct': tilt_x > 0, 'confidence': 1.0} for tilt_x, _ in features.tolist()]
+
+    def predict_fall_batch(self, features):
+        self.batches.append(len(features))
+        return [None] * len(features)
+
+
+class InferenceBatcherTests(SimpleTestCase):
+    def test_concurrent_requests_share_one_batch(self):
+        analyzer = RecordingAnalyzer()
+        batcher = InferenceBatcher(analyzer, max_batch_size=4, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.gather(*(batcher.predict_posture(value, 0) for value in (-1, 2, -3, 4)))
+
+        results = asyncio.run(run())
+        self.assertEqual([result['is_correct'] for result in results], [False, True, False, True])
+        self.assertEqual(analyzer.batches, [4])
+        self.assertEqual(batcher.stats()['batch_size']['count'], 1)
+
+    def test_partial_batch_flushes_after_max_wait(self):
+        analyzer = RecordingAnalyzer()
+        batcher = InferenceBatcher(analyzer, max_batch_size=64, max_wait_ms=1)
+
+        result = asyncio.run(batcher.predict_posture(5, 0))
+        self.assertTrue(result['is_correct'])
+        self.assertEqual(analyzer.batches, [1])
+
+
+    def test_sample_waits_one_window_for_posture_and_fall(self):
+        analyzer = RecordingAnalyzer()
+        self.addCleanup(setattr, consumers, 'inference_batcher', consumers.inference_batcher)
+        consumers.inference_batcher = InferenceBatcher(analyzer, max_batch_size=64, max_wait_ms=200)
+
+        async def run():
+            consumer = PostureConsumer()
+            started = time.perf_counter()
+            analysis = await consumer.analyze_sample(sensor_row({'tilt_x': 5.0}))
+            return analysis, time.perf_counter() - started
+
+        with override_settings(ML_BATCHING_ENABLED=True):
+            analysis, elapsed = asyncio.run(run())
+        self.assertTrue(analysis.is_correct)
+        self.assertEqual(analyzer.batches, [1, 1])
+        # Awaited one after the other, the two requests would take two windows
+        self.assertLess(elapsed, 0.35)
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.models_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.models_dir)
+
+    def touch(self, name):
+        open(os.path.join(self.models_dir, name), 'wb').close()
+
+    def test_scan_picks_newest_version(self):
+        self.touch('posture_model.pkl')
+        self.touch('posture_model.v2.pkl')
+        self.touch('posture_model.v10.pkl')
+        self.touch('fall_detection_model.pkl')
+        self.touch('notes.txt')
+
+        files = scan_model_files(self.models_dir)
+        self.assertEqual(files['posture'][0], 10)
+        self.assertEqual(files['fall'][0], 0)
+
+    def test_scan_prefers_npz_export_of_same_version(self):
+        self.touch('posture_model.v2.pkl')
+        self.touch('posture_model.v2.npz')
+        self.touch('posture_model.v1.npz')
+
+        self.assertTrue(scan_model_files(self.models_dir)['posture'][1].endswith('posture_model.v2.npz'))
+        self.assertTrue(scan_model_files(self.models_dir, formats=('pkl',))['posture'][1].endswith('.v2.pkl'))
+
+    def test_swap_defers_close_until_release(self):
+        self.touch('posture_model.pkl')
+        closed = []
+
+        class TrackedBundle(ModelBundle):
+            def close(self):
+                closed.append(self.versions['posture'])
+
+        registry = ModelRegistry(self.models_dir, TrackedBundle)
+        registry.load()
+        with registry.use() as bundle:
+            self.touch('posture_model.v1.pkl')
+            self.assertTrue(registry.load())
+            self.assertEqual(registry.current.versions, {'posture': 1})
+            # The in-flight user still holds version 0
+            self.assertEqual(closed, [])
+            self.assertEqual(bundle.versions, {'posture': 0})
+        self.assertEqual(closed, [0])
+        self.assertFalse(registry.load())
+
+
+class FallFeatureWindowTests(SimpleTestCase):
+    def test_rolling_features_match_direct_computation(self):
+        rng = np.random.default_rng(3)
+        samples = rng.normal(0, 2, size=(200, 3))
+        window = FallFeatureWindow(window_size=16, stillness_size=6, stride=4, sample_interval=0.1)
+
+        evaluations = 0
+        for i, sample in enumerate(samples):
+            if window.push(*sample):
+                evaluations += 1
+            if i < 16:
+                continue
+
+            magnitudes = np.linalg.norm(samples[i - 15:i + 1], axis=1)
+            jerks = np.abs(np.diff(np.linalg.norm(samples[i - 16:i + 1], axis=1))) / 0.1
+            expected = [magnitudes.mean(), magnitudes.max(), jerks.max(), magnitudes.var(), magnitudes[-6:].var()]
+            np.testing.assert_allclose(window.features(), expected, rtol=1e-9, atol=1e-9)
+            np.testing.assert_allclose(window.peak_sample, samples[i - 15 + np.argmax(magnitudes)])
+
+        # One evaluation when the window fills, then one per stride
+        self.assertEqual(evaluations, 1 + (200 - 16) // 4)
+
+
+class FallGateTests(SimpleTestCase):
+    def test_gate_opens_on_spike_and_holds(self):
+        stats = GateStats()
+        gate = FallGate(magnitude_threshold=3.0, rate_threshold=1000.0, hold_samples=2, stats=stats)
+        passed = [gate.update(*sample) for sample in ([0.1, 0, 0], [4.0, 0, 0], [0.1, 0, 0], [0.1, 0, 0], [0.1, 0, 0])]
+        self.assertEqual(passed, [False, True, True, True, False])
+        self.assertEqual((stats.evaluated, stats.gated), (3, 2))
+
+    def test_recall_against_full_model(self):
+        class ThresholdAnalyzer:
+            def predict_fall_batch(self, features):
+                return [{'is_fall': bool(np.linalg.norm(row) > 5), 'confidence': 1.0} for row in features]
+
+        samples = [[0.1, 0, 0]] * 10 + [[6.0, 0, 0]] + [[0.1, 0, 0]] * 10
+        result = measure_gate_recall(ThresholdAnalyzer(), samples, magnitude_threshold=3.0, hold_samples=0)
+        self.assertEqual(result['recall'], 1.0)
+        self.assertGreater(result['gated_fraction'], 0.9)
+
+    def test_stats_report_saved_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'fall_gate_replay.json')
+            stats = GateStats(replay_path=path)
+            self.assertIsNone(stats.snapshot()['recall'])
+
+            # Saved by one process (the replay command), read by another (the server)
+            save_replay_result({'samples': 21, 'recall': 0.75}, path)
+            snapshot = stats.snapshot()
+            self.assertEqual(snapshot['recall'], 0.75)
+            self.assertEqual(snapshot['replay']['samples'], 21)
+
+
+class LazyModelLoadingTests(SimpleTestCase):
+    def test_import_does_not_unpickle_models(self):
+        # A fresh interpreter, since this one has long imported monitoring.ml_models
+        script = (
+            "import django; django.setup()\n"
+            "import monitoring.registry as registry\n"
+            "loaded = []\n"
+            "load = registry.load_model_file\n"
+            "registry.load_model_file = lambda *args, **kwargs: loaded.append(args) or load(*args, **kwargs)\n"
+            "from monitoring.ml_models import posture_analyzer\n"
+            "print(len(loaded))\n"
+            "posture_analyzer.load_models()\n"
+            "print(len(loaded))\n"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='posture_monitor.settings')
+        output = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], cwd=settings.BASE_DIR,
+                                env=env, capture_output=True, text=True, check=True).stdout.split()
+        self.assertEqual(output[0], '0')
+        self.assertGreater(int(output[1]), 0)
+
+
+class BenchmarkSuiteTests(SimpleTestCase):
+    def test_report_with_synthetic_models(self):
+        report = run_benchmarks(batch_sizes=[1, 10], repeat=1, max_calls=5, force_synthetic=True)
+        self.assertEqual(report['meta']['synthetic_models'], ['posture', 'fall'])
+        operations = {(entry['analyzer'], entry['operation']) for entry in report['results']}
+        self.assertIn(('PostureAnalyzer', 'analyze_batch_data'), operations)
+        self.assertIn(('SimplePostureAnalyzer', 'predict_fall'), operations)
+        self.assertTrue(all(entry['seconds'] > 0 for entry in report['results'] if 'skipped' not in entry))
+        json.dumps(report)
+
+    def test_compare_flags_slowdowns_beyond_tolerance(self):
+        def report(*seconds):
+            return {'results': [
+                {'analyzer': 'PostureAnalyzer', 'operation': 'predict_posture_batch', 'batch_size': 10, 'seconds': seconds[0]},
+                {'analyzer': 'PostureAnalyzer', 'operation': 'predict_posture_batch', 'batch_size': 100, 'seconds': seconds[1]},
+                {'analyzer': 'PostureAnalyzer', 'operation': 'predict_fall', 'batch_size': 10, 'skipped': 'budget'},
+            ]}
+
+        regressions = compare_reports(report(1.0, 1.0), report(1.2, 2.0), tolerance=0.25)
+        self.assertEqual([entry['batch_size'] for entry in regressions], [100])
+        self.assertAlmostEqual(regressions[0]['slowdown'], 2.0)
+        self.assertEqual(compare_reports(report(1.0, 1.0), report(0.5, 1.1)), [])
+
+
+class ProcessPoolInferenceTests(SimpleTestCase):
+    def setUp(self):
+        self.models_dir, _ = prepare_models_dir(force_synthetic=True)
+        self.addCleanup(shutil.rmtree, self.models_dir)
+        self.paths = {kind: path for kind, (_, path, _) in scan_model_files(self.models_dir).items()}
+
+    def test_matches_in_process_model(self):
+        pool = ProcessPoolInference(self.paths, workers=2, slots=4, slot_rows=64)
+        self.addCleanup(pool.close)
+        for kind in ('posture', 'fall'):
+            model = load_model_file(self.paths[kind])
+            # Several slot-sized chunks spread over both workers
+            X = np.random.default_rng(3).uniform(-90, 90, size=(300, model.n_features_in_))
+            np.testing.assert_allclose(pool.predict_proba(kind, X), model.predict_proba(X))
+
+    def test_replaces_killed_worker(self):
+        pool = ProcessPoolInference(self.paths, workers=2, slots=4, slot_rows=64, timeout=10.0)
+        self.addCleanup(pool.close)
+        model = load_model_file(self.paths['posture'])
+        X = np.random.default_rng(4).uniform(-90, 90, size=(300, 2))
+
+        pool._workers[0].process.kill()
+        deadline = time.monotonic() + 60
+        while (pool.restarts < 1 or not all(worker.ready for worker in pool._workers)) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self.assertEqual(pool.restarts, 1)
+        self.assertEqual(len(pool._workers), 2)
+        # Every slot is back in service; none leaked with the dead worker
+        for _ in range(3):
+            np.testing.assert_allclose(pool.predict_proba('posture', X), model.predict_proba(X))
+        self.assertEqual(pool._free_slots.qsize(), 4)
+
+    def test_failed_start_cleans_up(self):
+        with open(self.paths['fall'], 'wb') as broken:
+            broken.write(b'not a model')
+        started = time.perf_counter()
+        with self.assertRaises(RuntimeError):
+            ProcessPoolInference(self.paths, workers=2, slots=2, slot_rows=16)
+        self.assertLess(time.perf_counter() - started, 30)
+
+
+class BackendSelectionTests(SimpleTestCase):
+    def setUp(self):
+        self.models_dir, _ = prepare_models_dir(force_synthetic=True)
+        self.addCleanup(shutil.rmtree, self.models_dir)
+
+    def test_auto_picks_a_matching_backend(self):
+        with override_settings(ML_MODELS_DIR=self.models_dir, ML_MODEL_RELOAD_INTERVAL=0,
+                               POSTURE_GRID_RESOLUTION=2.0):
+            analyzer = PostureAnalyzer(backend='auto', lazy=False)
+            reference = SimplePostureAnalyzer()
+
+        stats = analyzer.backend_stats()
+        self.assertIn(stats['active'], ('sklearn', 'compiled', 'grid'))
+        self.assertEqual(set(stats['auto_selection']), {'sklearn', 'compiled', 'grid'})
+        self.assertTrue(stats['auto_selection'][stats['active']]['matches_reference'])
+
+        X = np.random.default_rng(1).uniform(-90, 90, size=(50, 2))
+        for tilt_x, tilt_y in X.tolist():
+            self.assertEqual(analyzer.predict_posture(tilt_x, tilt_y), reference.predict_posture(tilt_x, tilt_y))
+
+
+    def test_auto_without_any_usable_backend_raises(self):
+        bundle = ModelBundle(posture_model=load_model_file(scan_model_files(self.models_dir)['posture'][1]))
+
+        def broken_posture(*args):
+            raise ValueError('broken')
+
+        with self.assertRaises(RuntimeError):
+            select_backend(bundle, {}, broken_posture, ('sklearn',))
+
+
+class AnalyzeSamplesTests(SimpleTestCase):
+    def setUp(self):
+        self.models_dir, _ = prepare_models_dir(force_synthetic=True)
+        self.addCleanup(shutil.rmtree, self.models_dir)
+        self.samples = np.random.default_rng(2).uniform(-90, 90, size=(300, 5)).astype(np.float32)
+
+    def assert_matches_separate_calls(self, analyzer):
+        analysis = analyzer.analyze_samples(self.samples)
+        posture = analyzer.predict_posture_batch(self.samples[:, :2].astype(np.float64))
+        fall = analyzer.predict_fall_batch(self.samples[:, 2:].astype(np.float64))
+        self.assertEqual(analysis.is_correct.tolist(), [result['is_correct'] for result in posture])
+        np.testing.assert_allclose(analysis.posture_confidence, [result['confidence'] for result in posture])
+        self.assertEqual(analysis.is_fall.tolist(), [result['is_fall'] for result in fall])
+
+        single = analyzer.analyze_sample(self.samples[0], posture=False)
+        self.assertIsNone(single.is_correct)
+        self.assertEqual(single.is_fall, fall[0]['is_fall'])
+
+    def test_matches_separate_model_calls(self):
+        with override_settings(ML_MODELS_DIR=self.models_dir, ML_MODEL_RELOAD_INTERVAL=0):
+            self.assert_matches_separate_calls(PostureAnalyzer(backend='sklearn', lazy=False))
+
+    def test_grid_backend_matches(self):
+        with override_settings(ML_MODELS_DIR=self.models_dir, ML_MODEL_RELOAD_INTERVAL=0,
+                               POSTURE_GRID_RESOLUTION=2.0):
+            self.assert_matches_separate_calls(PostureAnalyzer(backend='grid', lazy=False))
+
+    def test_posture_cache_serves_live_samples(self):
+        with override_settings(ML_MODELS_DIR=self.models_dir, ML_MODEL_RELOAD_INTERVAL=0,
+                               POSTURE_CACHE_SIZE=1024, POSTURE_CACHE_RESOLUTION=0.5):
+            analyzer = PostureAnalyzer(backend='sklearn', lazy=False)
+        samples = self.samples[:50].copy()
+        samples[25:, :2] = samples[:25, :2] + 0.01
+        analysis = analyzer.analyze_samples(samples, fall=False)
+        expected = [analyzer.predict_posture(tilt_x, tilt_y) for tilt_x, tilt_y in samples[:, :2].tolist()]
+        self.assertEqual(analysis.is_correct.tolist(), [result['is_correct'] for result in expected])
+        np.testing.assert_allclose(analysis.posture_confidence, [result['confidence'] for result in expected])
+        # Nudged readings share their cell with the first half
+        self.assertEqual(analyzer.analyze_sample(samples[30], fall=False).is_correct, expected[30]['is_correct'])
+        self.assertGreaterEqual(analyzer.posture_cache.stats()['hits'], 50)
+
+    def test_sensor_row_reuses_buffer(self):
+        row = sensor_row({})
+        self.assertIs(sensor_row({'tilt_x': 1.5, 'gyro_z': '2'}, row), row)
+        self.assertEqual(row.tolist(), [1.5, 0.0, 0.0, 0.0, 2.0])
+
+
+class PostureWindowTests(SimpleTestCase):
+    def test_expiry_and_capacity_match_list_rebuild(self):
+        window = PostureWindow(duration=3.0, capacity=25)
+        history = []
+        rng = np.random.default_rng(0)
+        timestamp = 0.0
+        for is_correct in (rng.random(200) < 0.4).tolist():
+            timestamp += float(rng.uniform(0.05, 0.3))
+            window.push(is_correct, timestamp)
+            history = [entry for entry in history + [(timestamp, is_correct)] if timestamp - entry[0] <= 3.0][-25:]
+            self.assertEqual(len(window), len(history))
+            self.assertEqual(window.incorrect_count, sum(1 for _, correct in history if not correct))
+
+    def test_rate_sized_window_spans_full_duration(self):
+        window = PostureWindow.for_rate(duration=300.0, max_rate_hz=100.0)
+        for i in range(300 * 100):
+            window.push(i % 2 == 0, 1700000000 + i / 100)
+        self.assertEqual(len(window), 30000)
+        self.assertAlmostEqual(window.span, 299.99, places=6)
+        # A clock stepping back counts as the newest time
+        window.push(True, 1700000000)
+        self.assertAlmostEqual(window.span, 299.99, places=6)
+
+
+class PostureWriteBufferTests(SimpleTestCase):
+    def test_flushes_on_size_timer_and_close(self):
+        written = []
+
+        async def writer(rows):
+            written.append(len(rows))
+
+        async def scenario():
+            stats = WriteStats()
+            buffer = PostureWriteBuffer(flush_size=3, flush_interval_ms=20, writer=writer, stats=stats)
+            sample = dict(user_id=1, tilt_x=0, tilt_y=0, gyro_x=0, gyro_y=0, gyro_z=0)
+            for _ in range(4):
+                await buffer.add(**sample)
+            await asyncio.sleep(0)
+            self.assertEqual(written, [3])
+            await asyncio.sleep(0.05)
+            self.assertEqual(written, [3, 1])
+            await buffer.add(**sample)
+            await buffer.close()
+            self.assertEqual(written, [3, 1, 1])
+            self.assertEqual(stats.snapshot()['rows'], 5)
+
+        asyncio.run(scenario())
+
+    def test_slow_writer_slows_add(self):
+        written = []
+
+        async def slow_writer(rows):
+            await asyncio.sleep(0.02)
+            written.append(len(rows))
+
+        async def scenario():
+            buffer = PostureWriteBuffer(flush_size=5, flush_interval_ms=1000, writer=slow_writer, stats=None,
+                                        max_pending_flushes=1)
+            sample = dict(user_id=1, tilt_x=0, tilt_y=0, gyro_x=0, gyro_y=0, gyro_z=0)
+            started = time.perf_counter()
+            peak = 0
+            for _ in range(50):
+                await buffer.add(**sample)
+                peak = max(peak, buffer.pending_flushes)
+            elapsed = time.perf_counter() - started
+            await buffer.close()
+            return peak, elapsed
+
+        peak, elapsed = asyncio.run(scenario())
+        self.assertEqual(peak, 1)
+        # Nine of the ten flushes had to wait for the one before
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertEqual(sum(written), 50)
+
+
+class IngestionWriterTests(SimpleTestCase):
+    def run_policy(self, policy):
+        transactions = []
+
+        async def writer(batches):
+            transactions.append([len(rows) for rows in batches])
+
+        async def scenario():
+            ingestion = IngestionWriter(max_queue=2, flush_interval_ms=20, policy=policy, writer=writer)
+            # The writer task takes the first batch, the next two fill the queue
+            await ingestion.submit([1])
+            await asyncio.sleep(0)
+            await ingestion.submit([2, 2])
+            await ingestion.submit([3])
+            await asyncio.wait_for(ingestion.submit([4, 4]), timeout=1)
+            await ingestion.join()
+            return ingestion.stats()
+
+        return transactions, asyncio.run(scenario())
+
+    def test_coalesces_and_drops(self):
+        transactions, stats = self.run_policy('drop')
+        self.assertEqual(transactions, [[1, 2, 1]])
+        self.assertEqual((stats['dropped_rows'], stats['rows_written']), (2, 4))
+
+    def test_merge_joins_newest_batch(self):
+        transactions, stats = self.run_policy('merge')
+        self.assertEqual(transactions, [[1, 2, 3]])
+        self.assertEqual(stats['merged_rows'], 2)
+
+    def test_block_waits_for_space(self):
+        transactions, stats = self.run_policy('block')
+        self.assertEqual(sum(map(sum, transactions)), 6)
+        self.assertEqual(stats['blocked'], 1)
+
+
+class InferenceExecutorTests(SimpleTestCase):
+    def test_limits_concurrency_and_abandons_slow_calls(self):
+        active = []
+        peak = []
+
+        def model_call(duration):
+            active.append(1)
+            peak.append(len(active))
+            time.sleep(duration)
+            active.pop()
+            return duration
+
+        async def scenario():
+            executor = InferenceExecutor(max_workers=2, timeout=0.1)
+            # Six queued calls take longer than the timeout in total, but each is timed from its own start
+            results = await asyncio.gather(*(executor.run(model_call, 0.06) for _ in range(6)))
+            slow = await executor.run(model_call, 0.3)
+            # The abandoned call keeps its thread, so nothing else runs beside it on that permit
+            self.assertEqual(len(active), 1)
+            unbounded = await executor.run(model_call, 0.15, timeout=None)
+            return executor.stats(), results, slow, unbounded
+
+        stats, results, slow, unbounded = asyncio.run(scenario())
+        self.assertEqual(results, [0.06] * 6)
+        self.assertIsNone(slow)
+        self.assertEqual(unbounded, 0.15)
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual((stats['calls'], stats['timeouts'], stats['slow_calls']), (8, 1, 1))
+
+    def test_lag_monitor_counts_stalls(self):
+        async def scenario():
+            executor = InferenceExecutor(lag_interval=0.01, stall_threshold_ms=50)
+            await executor.run(int, 1)
+            # A model call made directly on the loop blocks every other connection
+            time.sleep(0.1)
+            await asyncio.sleep(0.05)
+            return executor.stats()['event_loop']
+
+        stats = asyncio.run(scenario())
+        self.assertGreaterEqual(stats['stalls'], 1)
+        self.assertGreaterEqual(stats['max_lag_ms'], 50)
+
+
+class FallIncidentTrackerTests(SimpleTestCase):
+    def test_coalesces_samples_and_suppresses_repeat_calls(self):
+        tracker = FallIncidentTracker(quiet_seconds=30, suppress_seconds=300)
+        first = tracker.observe(now=1000)
+        self.assertTrue(first.opened and first.notify)
+        tracker.mark_notified(first.incident)
+        attached = tracker.observe(4, now=1010)
+        self.assertFalse(attached.opened or attached.notify)
+        self.assertIs(attached.incident, first.incident)
+
+        # A second fall after the first went quiet is its own incident, but the
+        # contact was called two minutes ago
+        second = tracker.observe(now=1120)
+        self.assertTrue(second.opened)
+        self.assertFalse(second.notify)
+        self.assertIs(second.closed, first.incident)
+        self.assertEqual(first.incident.samples, 5)
+
+        self.assertTrue(tracker.observe(now=1400).notify)
+
+    def test_cooldown_starts_only_when_notified(self):
+        tracker = FallIncidentTracker(quiet_seconds=30, suppress_seconds=300)
+        # Nothing was sent for the first fall (e.g. no contact), so the next one may notify
+        self.assertTrue(tracker.observe(now=1000).notify)
+        self.assertTrue(tracker.observe(now=1100).notify)
+        self.assertIsNone(tracker.last_notified)
+
+
+class SensorFrameTests(SimpleTestCase):
+    def setUp(self):
+        self.samples = np.random.default_rng(3).uniform(-30, 30, size=(40, 5))
+
+    def test_float32_round_trip_is_zero_copy(self):
+        data = encode_frame('esp32-1', 7, self.samples, timestamp=1700000000.0, interval=0.02)
+        frame = decode_frame(data)
+        self.assertEqual((frame.device_id, frame.sequence), ('esp32-1', 7))
+        np.testing.assert_array_equal(frame.samples, self.samples.astype(np.float32))
+        self.assertFalse(frame.samples.flags.writeable)
+        self.assertAlmostEqual(frame.timestamps[-1], 1700000000.0 + 39 * 0.02, places=4)
+
+    def test_int16_round_trip(self):
+        scales = [0.01, 0.01, 0.001, 0.001, 0.001]
+        frame = decode_frame(encode_frame('esp32-1', 8, self.samples / 10, scales=scales))
+        np.testing.assert_allclose(frame.samples, self.samples / 10, atol=0.006)
+        self.assertIsNone(frame.timestamps)
+
+    def test_rejects_truncated_frames(self):
+        data = encode_frame('esp32-1', 9, self.samples)
+        with self.assertRaises(FrameError):
+            decode_frame(data[:-1])
+
+
+class UpdateThrottleTests(SimpleTestCase):
+    def test_coalesces_between_sends(self):
+        throttle = UpdateThrottle(rate_hz=4)
+        self.assertEqual(throttle.delay(now=0.0), 0.0)
+        throttle.add({'tilt_x': 1.0, 'fall_detected': False}, [[1, 2, 0, 0, 0]], 1, 1)
+        first = throttle.take(now=0.0)
+        self.assertEqual(first['sample_count'], 1)
+
+        throttle.add({'tilt_x': 5.0, 'fall_detected': False}, [[5, 2, 0, 0, 0], [3, 4, 0, 0, 0]], 1, 2)
+        throttle.add({'tilt_x': -1.0, 'fall_detected': False, 'fall_confidence': 0.2}, [[-1, 0, 0, 0, 1]], 0, 1)
+        self.assertAlmostEqual(throttle.delay(now=0.1), 0.15)
+        update = throttle.take(now=0.25)
+        self.assertEqual((update['tilt_x'], update['sample_count']), (-1.0, 3))
+        self.assertAlmostEqual(update['posture_correct_fraction'], 1 / 3)
+        self.assertEqual(update['aggregates']['min']['tilt_x'], -1.0)
+        self.assertEqual(update['aggregates']['max']['tilt_y'], 4.0)
+        self.assertAlmostEqual(update['aggregates']['mean']['gyro_z'], 1 / 3)
+        self.assertFalse(throttle.pending)
+
+
+class BaselineClassifierTests(SimpleTestCase):
+    def test_calibrated_baseline_answers_clear_samples(self):
+        rng = np.random.default_rng(0)
+        window = CalibrationWindow(size=200)
+        for tilt_x, tilt_y in rng.normal((5.0, -3.0), (1.0, 2.0), size=(200, 2)).tolist():
+            full = window.add(tilt_x, tilt_y)
+        self.assertTrue(full)
+
+        stats = BaselineStats()
+        classifier = BaselineClassifier(*window.baseline(), inner_radius=2.0, stats=stats)
+        self.assertTrue(classifier.classify(5.5, -2.0)['is_correct'])
+        # Outside the calibrated ellipse only the model can answer, however far out
+        self.assertIsNone(classifier.classify(8.0, -3.0))
+        self.assertIsNone(classifier.classify(5.0, 20.0))
+        self.assertEqual(stats.snapshot()['escalated'], 2)
+
+        correct, answered = classifier.classify_many([[5.5, -2.0], [5.0, 20.0]])
+        self.assertEqual((correct.tolist(), answered.tolist()), ([True, False], [True, False]))
+
+    def test_probe_points_lie_on_the_inner_ellipse(self):
+        classifier = BaselineClassifier([1.0, -2.0], [[4.0, 1.0], [1.0, 2.0]], inner_radius=2.0)
+        points = classifier.probe_points(rings=(0.5, 1.0), count=8)
+        self.assertEqual(points.shape, (17, 2))
+        distances = [classifier.distance(*point) for point in points.tolist()]
+        np.testing.assert_allclose(distances, [0.0] + [1.0] * 8 + [2.0] * 8, atol=1e-9)
+
+    def test_radius_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            BaselineClassifier([0, 0], [[1, 0], [0, 1]], inner_radius=0)
+
+
+class QuantizedLRUCacheTests(SimpleTestCase):
+    def test_hits_evictions_and_owner_invalidation(self):
+        cache = QuantizedLRUCache(max_size=2, resolution=0.5)
+        owner = object()
+        self.assertEqual(cache.quantize(1.1, -0.2), cache.quantize(0.9, -0.1))
+
+        cache.put(owner, cache.quantize(1.0, 0.0), 'a')
+        cache.put(owner, cache.quantize(2.0, 0.0), 'b')
+        self.assertEqual(cache.get(owner, cache.quantize(1.1, 0.1)), 'a')
+        cache.put(owner, cache.quantize(3.0, 0.0), 'c')
+        # 'b' was least recently used
+        self.assertIsNone(cache.get(owner, cache.quantize(2.0, 0.0)))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        self.assertIsNone(cache.get(object(), cache.quantize(1.0, 0.0)))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['invalidations'], stats['size']), (1, 2, 1, 0))
+
+
+class PostureFrameConsumerTests(TransactionTestCase):
+    def test_frame_gets_one_aggregated_update(self):
+        user = User.objects.create(username='frame-user')
+        started = round(time.time()) - 60
+        samples = [
+            {'tilt_x': 2.0 * i, 'tilt_y': -1.0, 'gyro_x': 0.1, 'gyro_y': 0.0, 'gyro_z': 0.0, 'timestamp': started + i / 50}
+            for i in range(25)
+        ]
+
+        async def scenario():
+            communicator = WebsocketCommunicator(PostureConsumer.as_asgi(), '/ws/posture/')
+            await communicator.connect()
+            await communicator.send_json_to({'type': 'device_connect', 'user_id': user.id, 'device_id': 'frame-device'})
+            await communicator.receive_json_from()
+            await communicator.send_json_to({'type': 'posture_data', 'samples': samples})
+            update = await communicator.receive_json_from(timeout=30)
+            self.assertTrue(await communicator.receive_nothing())
+            await communicator.disconnect()
+            return update
+
+        update = async_to_sync(scenario)()
+        self.assertEqual(update['type'], 'posture_update')
+        self.assertEqual(update['data']['sample_count'], 25)
+        self.assertEqual(update['data']['tilt_x'], 48.0)
+        self.assertEqual(PostureData.objects.filter(user=user).count(), 25)
+        self.assertEqual(PostureData.objects.filter(user=user).earliest('timestamp').timestamp.timestamp(), started)
+
+    def test_skewed_device_timestamps_fall_back_to_arrival_time(self):
+        consumer = PostureConsumer()
+        now = time.time()
+        # Seconds since boot, a clock an hour ahead, and a plausible reading
+        since_boot, ahead, valid = (consumer.sample_timestamp(timestamp) for timestamp in (12.5, now + 3600, now - 5))
+        self.assertAlmostEqual(since_boot.timestamp(), now, delta=5)
+        self.assertAlmostEqual(ahead.timestamp(), now, delta=5)
+        self.assertAlmostEqual(valid.timestamp(), now - 5, places=3)
+        self.assertAlmostEqual(consumer.sample_timestamp(None).timestamp(), now, delta=5)
+
+    def test_binary_frame(self):
+        user = User.objects.create(username='binary-user')
+        samples = np.zeros((10, 5))
+        samples[:, 0] = np.arange(10)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(PostureConsumer.as_asgi(), '/ws/posture/')
+            await communicator.connect()
+            await communicator.send_json_to({'type': 'device_connect', 'user_id': user.id, 'device_id': 'esp32-7'})
+            await communicator.receive_json_from()
+            await communicator.send_to(bytes_data=encode_frame('esp32-7', 1, samples))
+            first = await communicator.receive_json_from(timeout=30)
+            await communicator.send_to(bytes_data=encode_frame('esp32-7', 4, samples))
+            second = await communicator.receive_json_from(timeout=30)
+            await communicator.send_to(bytes_data=encode_frame('other', 5, samples))
+            error = await communicator.receive_json_from(timeout=30)
+            await communicator.disconnect()
+            return first, second, error
+
+        first, second, error = async_to_sync(scenario)()
+        self.assertEqual((first['data']['sample_count'], first['data']['tilt_x']), (10, 9.0))
+        self.assertEqual(second['data']['frames_lost'], 2)
+        self.assertEqual(error['type'], 'error')
+        self.assertEqual(PostureData.objects.filter(user=user).count(), 20)
+
+
+class FallIncidentConsumerTests(TransactionTestCase):
+    def test_one_alert_per_incident(self):
+        user = User.objects.create(username='incident-user')
+        sent = []
+
+        async def scenario():
+            consumer = PostureConsumer()
+            consumer.user = user
+
+            async def send(text_data=None, bytes_data=None):
+                sent.append(json.loads(text_data))
+
+            consumer.send = send
+            for samples in (1, 3, 2):
+                await consumer.handle_fall_detection(samples)
+            await consumer.save_fall_incident(consumer.fall_incidents.close())
+
+        async_to_sync(scenario)()
+        alert = EmergencyAlert.objects.get(user=user)
+        self.assertEqual(alert.fall_samples, 6)
+        self.assertIsNotNone(alert.last_detected_at)
+        self.assertEqual([message['type'] for message in sent], ['fall_alert'])
+
+    def test_alert_without_contact_does_not_start_cooldown(self):
+        user = User.objects.create(username='no-contact-user')
+
+        async def scenario():
+            consumer = PostureConsumer()
+            consumer.user = user
+            consumer.profile = await consumer.load_profile(user.id)
+
+            async def send(text_data=None, bytes_data=None):
+                pass
+
+            consumer.send = send
+            await consumer.handle_fall_detection()
+            consumer.fall_incidents.close()
+            # The user adds a contact; the next fall reaches it
+            consumer.profile = consumer.profile._replace(emergency_contact='+15551234567')
+            await consumer.handle_fall_detection()
+            return consumer.fall_incidents.last_notified
+
+        self.assertIsNotNone(async_to_sync(scenario)())
+        first, second = EmergencyAlert.objects.filter(user=user).order_by('id')
+        self.assertEqual((first.notification_suppressed, first.suppression_reason), (True, 'no_contact'))
+        self.assertEqual((second.notification_suppressed, second.suppression_reason), (False, ''))
+        self.assertEqual(AlertOutbox.objects.filter(alert=second).count(), 2)
+
+
+class CalibrationConsumerTests(TransactionTestCase):
+    def test_calibration_feeds_connection_snapshot(self):
+        user = User.objects.create(username='calibration-user')
+        rng = np.random.default_rng(0)
+        upright = [
+            {'tilt_x': tilt_x, 'tilt_y': tilt_y, 'gyro_x': 0.0, 'gyro_y': 0.0, 'gyro_z': 0.0}
+            for tilt_x, tilt_y in rng.normal(0.0, 1.0, size=(50, 2)).tolist()
+        ]
+        probe = [{'tilt_x': 0.0, 'tilt_y': 0.0, 'gyro_x': 0.0, 'gyro_y': 0.0, 'gyro_z': 0.0}]
+
+        async def receive_type(communicator, message_type):
+            while True:
+                message = await communicator.receive_json_from(timeout=30)
+                if message['type'] == message_type:
+                    return message
+
+        async def scenario():
+            communicator = WebsocketCommunicator(PostureConsumer.as_asgi(), '/ws/posture/')
+            await communicator.connect()
+            await communicator.send_json_to({'type': 'device_connect', 'user_id': user.id, 'device_id': 'esp32-cal'})
+            await receive_type(communicator, 'connection_success')
+            await communicator.send_json_to({'type': 'posture_data', 'samples': probe})
+            before = await receive_type(communicator, 'posture_update')
+
+            await communicator.send_json_to({'type': 'calibration_start'})
+            await receive_type(communicator, 'calibration_started')
+            await communicator.send_json_to({'type': 'posture_data', 'samples': upright})
+            complete = await receive_type(communicator, 'calibration_complete')
+
+            await communicator.send_json_to({'type': 'posture_data', 'samples': probe})
+            after = await receive_type(communicator, 'posture_update')
+            await communicator.disconnect()
+            return before, complete, after
+
+        before, complete, after = async_to_sync(scenario)()
+        # The model answered before calibration; the verified baseline answers after it
+        self.assertIsNotNone(before['data']['posture_confidence'])
+        self.assertTrue(after['data']['posture_correct'])
+        self.assertIsNone(after['data']['posture_confidence'])
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual(profile.posture_baseline_mean, complete['mean'])
+        self.assertIsNotNone(profile.posture_calibrated_at)
+
+
+    def test_baseline_survives_slow_first_model_load(self):
+        user = User.objects.create(username='lazy-baseline-user')
+        UserProfile.objects.create(
+            user=user, posture_baseline_mean=[45.0, 45.0], posture_baseline_covariance=[[1.0, 0.0], [0.0, 1.0]]
+        )
+        models_dir, _ = prepare_models_dir(force_synthetic=True)
+        self.addCleanup(shutil.rmtree, models_dir)
+
+        class SlowLoadingAnalyzer(PostureAnalyzer):
+            def build_bundle(self, model_files):
+                # Slower than the executor timeout below, like a grid or auto backend
+                time.sleep(0.3)
+                return super().build_bundle(model_files)
+
+        with override_settings(ML_MODELS_DIR=models_dir, ML_MODEL_RELOAD_INTERVAL=0):
+            analyzer = SlowLoadingAnalyzer(lazy=True)
+        self.addCleanup(setattr, consumers, 'posture_analyzer', consumers.posture_analyzer)
+        self.addCleanup(setattr, inference_executor, 'timeout', inference_executor.timeout)
+        consumers.posture_analyzer = analyzer
+        inference_executor.timeout = 0.1
+
+        async def scenario():
+            consumer = PostureConsumer()
+            consumer.channel_layer = None
+            sent = []
+
+            async def send(text_data=None, bytes_data=None):
+                sent.append(json.loads(text_data))
+
+            consumer.send = send
+            await consumer.handle_device_connection({'type': 'device_connect', 'user_id': user.id})
+            return consumer.posture_baseline, sent
+
+        baseline, sent = async_to_sync(scenario)()
+        self.assertEqual([message['type'] for message in sent], ['connection_success'])
+        self.assertIsNotNone(baseline)
+
+    def test_baseline_answer_skips_executor_when_fall_gate_is_closed(self):
+        async def scenario():
+            consumer = PostureConsumer()
+            consumer.posture_baseline = BaselineClassifier([0.0, 0.0], [[1.0, 0.0], [0.0, 1.0]])
+            consumer.fall_gate = FallGate(stats=None)
+            calls = inference_executor.calls
+            analysis = await consumer.analyze_sample(sensor_row({'tilt_x': 0.1, 'tilt_y': -0.1}))
+            return analysis, inference_executor.calls - calls
+
+        analysis, calls = async_to_sync(scenario)()
+        self.assertEqual(analysis, (True, None, None, None))
+        self.assertEqual(calls, 0)
+
+class ProfileSnapshotTests(TransactionTestCase):
+    def test_settings_change_refreshes_live_connection(self):
+        user = User.objects.create_user(username='profile-user', password='secret')
+        self.client.force_login(user)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(PostureConsumer.as_asgi(), '/ws/posture/')
+            await communicator.connect()
+            await communicator.send_json_to({'type': 'device_connect', 'user_id': user.id, 'device_id': 'esp32-9'})
+            await communicator.receive_json_from()
+
+            # Stand in for a second connection of the same user
+            channel_layer = get_channel_layer()
+            listener = await channel_layer.new_channel()
+            await channel_layer.group_add(profile_group(user.id), listener)
+            await sync_to_async(self.client.post)('/settings/', {'emergency_contact': '+15557654321'})
+            message = await asyncio.wait_for(channel_layer.receive(listener), timeout=5)
+            await communicator.disconnect()
+            return message
+
+        self.assertEqual(async_to_sync(scenario)(), {'type': 'profile.changed'})
+
+        async def refresh():
+            consumer = PostureConsumer()
+            consumer.user = user
+            await consumer.profile_changed({'type': 'profile.changed'})
+            return consumer.profile
+
+        profile = async_to_sync(refresh)()
+        self.assertEqual(profile.emergency_contact, '+15557654321')
+        self.assertEqual(profile.device_id, 'esp32-9')
+        self.assertFalse(UserProfile.objects.get(user=user).is_device_connected)
+
+
+class AlertDispatcherTests(TransactionTestCase):
+    def test_delivers_outbox_through_fake_twilio(self):
+        user = User.objects.create(username='fall-user')
+        alert = EmergencyAlert.objects.create(user=user, alert_type='fall')
+        requests = []
+
+        async def twilio(request):
+            form = await request.post()
+            requests.append((request.match_info['resource'], request.headers.get('Authorization'), dict(form)))
+            # The first SMS attempt hits a transient provider error
+            if request.match_info['resource'] == 'Messages' and len([r for r in requests if r[0] == 'Messages']) == 1:
+                return web.json_response({'message': 'Service unavailable'}, status=503)
+            return web.json_response({'sid': f"{request.match_info['resource'][:2].upper()}{len(requests)}"}, status=201)
+
+        app = web.Application()
+        app.router.add_post('/2010-04-01/Accounts/AC123/{resource}.json', twilio)
+
+        async def scenario():
+            server = TestServer(app)
+            await server.start_server()
+            dispatcher = AlertDispatcher(
+                api_base=str(server.make_url('')), account_sid='AC123', auth_token='secret',
+                from_number='+15550000000', backoff_base=0.01,
+            )
+            try:
+                created = await enqueue_emergency_notifications(alert, '+15551234567', 'Fall & help')
+                # Enqueueing the same alert again adds nothing
+                duplicate = await enqueue_emergency_notifications(alert, '+15551234567', 'Fall & help')
+                first = await dispatcher.dispatch_due()
+                await asyncio.sleep(0.05)
+                second = await dispatcher.dispatch_due()
+                third = await dispatcher.dispatch_due()
+                return created, duplicate, (first, second, third), dispatcher.stats()
+            finally:
+                await dispatcher.close()
+                await server.close()
+
+        created, duplicate, delivered, stats = async_to_sync(scenario)()
+        self.assertEqual((created, duplicate), (2, 0))
+        self.assertEqual(delivered, (1, 1, 0))
+        self.assertEqual((stats['sent'], stats['retries']), (2, 1))
+        self.assertEqual(sorted(r[0] for r in requests), ['Calls', 'Messages', 'Messages'])
+        self.assertTrue(all(r[1].startswith('Basic ') for r in requests))
+        call = next(form for resource, _, form in requests if resource == 'Calls')
+        self.assertEqual(call['Twiml'], '<Response><Say>Fall &amp; help</Say></Response>')
+
+        sms = AlertOutbox.objects.get(alert=alert, channel='sms')
+        self.assertEqual((sms.status, sms.attempts), ('sent', 2))
+        self.assertTrue(sms.provider_sid)
+        self.assertTrue(EmergencyAlert.objects.get(pk=alert.pk).emergency_contact_notified)
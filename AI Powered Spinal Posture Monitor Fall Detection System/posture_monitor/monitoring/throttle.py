@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+
+from .ml_models import SENSOR_CHANNELS
+
+
+class UpdateThrottle:
+    """
+    Coalesces outbound posture_update messages to at most rate_hz per second.
+
+    Every update is folded into the pending one; take() returns the latest
+    update extended with the sample count, posture-correct fraction, any fall
+    and per-channel min / max / mean over everything folded in since the last
+    send. A rate of 0 disables throttling.
+    """
+
+    def __init__(self, rate_hz=10.0):
+        self.interval = 1.0 / rate_hz if rate_hz else 0.0
+        self._last_sent = None
+        self._reset()
+
+    def _reset(self):
+        self._latest = None
+        self._count = 0
+        self._correct = 0
+        self._evaluated = 0
+        self._fall_detected = False
+        self._fall_confidence = None
+        self._min = np.full(len(SENSOR_CHANNELS), np.inf)
+        self._max = np.full(len(SENSOR_CHANNELS), -np.inf)
+        self._sum = np.zeros(len(SENSOR_CHANNELS))
+
+    @property
+    def pending(self):
+        return self._latest is not None
+
+    def add(self, data, readings, correct, evaluated):
+        """
+        Fold in one posture_update payload
+        readings: (n, 5) sensor values it covers, in SENSOR_CHANNELS order
+        correct / evaluated: posture-correct and classified sample counts
+        """
+        readings = np.asarray(readings, dtype=np.float64).reshape(-1, len(SENSOR_CHANNELS))
+        self._latest = data
+        self._count += len(readings)
+        self._correct += correct
+        self._evaluated += evaluated
+        self._fall_detected = self._fall_detected or bool(data.get('fall_detected'))
+        if data.get('fall_confidence') is not None:
+            self._fall_confidence = max(self._fall_confidence or 0.0, data['fall_confidence'])
+        if len(readings):
+            np.minimum(self._min, readings.min(axis=0), out=self._min)
+            np.maximum(self._max, readings.max(axis=0), out=self._max)
+            self._sum += readings.sum(axis=0)
+
+    def delay(self, now=None):
+        """Seconds until the pending update may be sent (0 when it is due)"""
+        if self._last_sent is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(self._last_sent + self.interval - now, 0.0)
+
+    def take(self, now=None):
+        """Return the coalesced update payload and start a new interval"""
+        data = dict(self._latest)
+        data.update({
+            'sample_count': self._count,
+            'posture_correct_fraction': self._correct / self._evaluated if self._evaluated else None,
+            'fall_detected': self._fall_detected,
+            'fall_confidence': self._fall_confidence,
+        })
+        if self._count:
+            data['aggregates'] = {
+                'min': dict(zip(SENSOR_CHANNELS, self._min.tolist())),
+                'max': dict(zip(SENSOR_CHANNELS, self._max.tolist())),
+                'mean': dict(zip(SENSOR_CHANNELS, (self._sum / self._count).tolist())),
+            }
+        self._last_sent = time.monotonic() if now is None else now
+        self._reset()
+        return data
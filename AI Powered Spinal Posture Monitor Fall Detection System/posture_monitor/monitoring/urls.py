@@ -12,4 +12,5 @@ urlpatterns = [
     path('settings/', views.settings, name='settings'),
     path('api/upload-offline-data/', views.upload_offline_data, name='upload_offline_data'),
     path('api/posture-history/', views.api_posture_history, name='posture_history'),
+    path('api/inference-stats/', views.api_inference_stats, name='inference_stats'),
 ]
\ No newline at end of file
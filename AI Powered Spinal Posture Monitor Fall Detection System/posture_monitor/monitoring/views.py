@@ -7,6 +7,13 @@ from django.views.decorators.csrf import csrf_exempt
 from django.core.files.storage import FileSystemStorage
 from .models import PostureData, PostureSession, UserProfile, EmergencyAlert
 from .ml_models import posture_analyzer
+from .alerts import alert_dispatcher
+from .batching import inference_batcher
+from .calibration import baseline_stats
+from .executor import inference_executor
+from .fall_gate import fall_gate_stats
+from .persistence import ingestion_writer, write_stats
+from .profiles import notify_profile_changed
 import json
 import csv
 import io
@@ -241,6 +248,8 @@ def settings(request):
         emergency_contact = request.POST.get('emergency_contact')
         profile.emergency_contact = emergency_contact
         profile.save()
+        # Live device connections keep a snapshot of the profile
+        notify_profile_changed(request.user.id)
         return redirect('settings')
     
     return render(request, 'settings.html', {'profile': profile})
@@ -258,6 +267,21 @@ def api_posture_history(request):
     
     return JsonResponse(list(data), safe=False)
 
+@login_required
+def api_inference_stats(request):
+    """API endpoint exposing real-time inference scheduler metrics"""
+    return JsonResponse({
+        'batching': inference_batcher.stats(),
+        'fall_gate': fall_gate_stats.snapshot(),
+        'posture_cache': posture_analyzer.posture_cache.stats() if posture_analyzer.posture_cache else None,
+        'backend': posture_analyzer.backend_stats(),
+        'posture_baseline': baseline_stats.snapshot(),
+        'posture_writes': write_stats.snapshot(),
+        'ingestion': ingestion_writer.stats(),
+        'executor': inference_executor.stats(),
+        'alerts': alert_dispatcher.stats()
+    })
+
 @login_required
 def get_user_data(request):
     """
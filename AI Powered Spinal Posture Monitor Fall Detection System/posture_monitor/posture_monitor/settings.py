@@ -151,7 +151,135 @@ CORS_ALLOW_ALL_ORIGINS = True
 # ML Models path
 ML_MODELS_DIR = BASE_DIR / 'ml_models'
 
+# Seconds between scans of ML_MODELS_DIR for newer versioned model files
+# (e.g. posture_model.v2.pkl); 0 disables hot reloading
+ML_MODEL_RELOAD_INTERVAL = 5.0
+
+# Load models on the first prediction instead of when monitoring.ml_models is imported
+ML_MODELS_LAZY = True
+# joblib mmap_mode for model files (None or 'r' to share array pages between
+# workers); sklearn forest pickles gain nothing from it, so check
+# manage.py model_startup_report before enabling it
+ML_MODELS_MMAP_MODE = None
+
+# Rows per predict_proba call when analyzing uploaded batches
+ML_BATCH_CHUNK_SIZE = 50000
+
+# Inference backend: 'sklearn', 'compiled' (tree ensembles flattened into NumPy
+# node tables), 'grid' (compiled trees plus the posture lookup grid),
+# 'process_pool' (worker processes fed through shared memory) or 'auto'
+# (benchmark ML_AUTO_BACKEND_CANDIDATES whenever models load and keep the
+# fastest one whose predictions match sklearn on a validation sample)
+ML_INFERENCE_BACKEND = 'sklearn'
+ML_AUTO_BACKEND_CANDIDATES = ('sklearn', 'compiled', 'grid')
+ML_PROCESS_POOL_WORKERS = 2
+ML_PROCESS_POOL_SLOTS = 16
+ML_PROCESS_POOL_SLOT_ROWS = 4096
+
+# Precomputed (tilt_x, tilt_y) decision grid for real-time posture calls.
+# Cells that straddle a decision boundary fall back to the model.
+POSTURE_GRID_ENABLED = False
+POSTURE_GRID_RANGE = (-90.0, 90.0)
+POSTURE_GRID_RESOLUTION = 0.5
+
+# LRU memoization of real-time posture predictions keyed on tilt quantized to
+# POSTURE_CACHE_RESOLUTION degrees; 0 disables the cache
+POSTURE_CACHE_SIZE = 0
+POSTURE_CACHE_RESOLUTION = 0.1
+
+# Per-user calibration: POSTURE_CALIBRATION_SAMPLES upright samples give a
+# baseline mean/covariance; readings within the inner Mahalanobis radius are
+# correct (once the model agrees with that whole ellipse), everything else
+# goes to the model
+POSTURE_BASELINE_ENABLED = True
+POSTURE_CALIBRATION_SAMPLES = 50
+POSTURE_BASELINE_INNER_RADIUS = 2.0
+
+# Write-behind persistence: each connection bulk-inserts its PostureData rows
+# every POSTURE_WRITE_FLUSH_SIZE samples or POSTURE_WRITE_FLUSH_INTERVAL_MS,
+# and on disconnect. With POSTURE_WRITE_MAX_PENDING_FLUSHES writes in flight,
+# the connection waits before taking more samples.
+POSTURE_WRITE_FLUSH_SIZE = 50
+POSTURE_WRITE_FLUSH_INTERVAL_MS = 1000.0
+POSTURE_WRITE_MAX_PENDING_FLUSHES = 2
+
+# Hand those bulk writes to one ingestion task per process that commits all
+# batches queued within POSTURE_INGESTION_FLUSH_INTERVAL_MS in one transaction.
+# POSTURE_INGESTION_POLICY says what a full queue does to a connection:
+# 'block' (wait for space), 'drop' or 'merge' (join the newest queued batch)
+POSTURE_INGESTION_ENABLED = False
+POSTURE_INGESTION_QUEUE_SIZE = 256
+POSTURE_INGESTION_FLUSH_INTERVAL_MS = 200.0
+POSTURE_INGESTION_POLICY = 'block'
+POSTURE_INGESTION_MAX_MERGE_ROWS = 1000
+
+# Most posture_update messages a connection sends per second; readings in
+# between are folded into the next one as min/max/mean aggregates. Falls are
+# sent immediately. 0 sends one update per message.
+POSTURE_UPDATE_RATE_HZ = 10.0
+
+# Posture history sizing: the 5-minute incorrect-posture window holds
+# POSTURE_MAX_SAMPLE_RATE_HZ samples per second, and the vibration rule waits
+# for POSTURE_MIN_HISTORY_SECONDS of data
+POSTURE_MAX_SAMPLE_RATE_HZ = 100.0
+POSTURE_MIN_HISTORY_SECONDS = 10.0
+
+# Device-supplied sample timestamps further than this many seconds from server
+# time (e.g. seconds since boot, or a clock running ahead) are replaced by the
+# time of arrival
+FRAME_TIMESTAMP_MAX_SKEW = 300.0
+
+# Real-time model calls run on a dedicated pool of ML_INFERENCE_WORKERS threads,
+# never on the event loop. A posture call running longer than
+# ML_INFERENCE_TIMEOUT seconds is abandoned and the sample is treated as
+# unclassified; fall calls always wait for their result.
+ML_INFERENCE_WORKERS = 2
+ML_INFERENCE_TIMEOUT = 2.0
+
+# Event loop lag probe: wake-ups later than EVENT_LOOP_STALL_MS are counted as stalls
+EVENT_LOOP_LAG_INTERVAL = 0.1
+EVENT_LOOP_STALL_MS = 100.0
+
+# Cross-connection micro-batching of real-time inference requests
+ML_BATCHING_ENABLED = False
+ML_BATCH_MAX_SIZE = 64
+ML_BATCH_MAX_WAIT_MS = 5.0
+
+# Fall detection: 'sample' classifies every gyro reading, 'window' keeps rolling
+# per-device features and evaluates the model every FALL_WINDOW_STRIDE samples
+FALL_DETECTION_MODE = 'sample'
+FALL_WINDOW_SIZE = 20
+FALL_STILLNESS_SIZE = 10
+FALL_WINDOW_STRIDE = 5
+FALL_SAMPLE_INTERVAL = 0.1
+
+# Physics pre-filter in front of the fall model (thresholds in gyro units and
+# gyro units per second); check recall with manage.py replay_fall_gate, which
+# saves its result to FALL_GATE_REPLAY_FILE for the inference stats endpoint
+FALL_GATE_ENABLED = False
+FALL_GATE_MAGNITUDE = 3.0
+FALL_GATE_RATE = 20.0
+FALL_GATE_HOLD_SAMPLES = 20
+FALL_GATE_REPLAY_FILE = ML_MODELS_DIR / 'fall_gate_replay.json'
+
 # Twilio settings (for emergency calls)
 TWILIO_ACCOUNT_SID = 'your_twilio_account_sid'
 TWILIO_AUTH_TOKEN = 'your_twilio_auth_token'
 TWILIO_PHONE_NUMBER = 'your_twilio_phone_number'
+
+# Emergency SMS and calls are written to the AlertOutbox table and delivered by
+# a background dispatcher over pooled connections; failed sends are retried
+# with exponential backoff (seconds) up to ALERT_DISPATCH_MAX_ATTEMPTS
+TWILIO_API_BASE = 'https://api.twilio.com'
+ALERT_DISPATCH_MAX_ATTEMPTS = 5
+ALERT_DISPATCH_BACKOFF_BASE = 2.0
+ALERT_DISPATCH_BACKOFF_MAX = 300.0
+ALERT_DISPATCH_POLL_INTERVAL = 10.0
+ALERT_DISPATCH_MAX_CONNECTIONS = 10
+ALERT_DISPATCH_REQUEST_TIMEOUT = 10.0
+
+# Positive fall samples within FALL_INCIDENT_QUIET_SECONDS of each other form one
+# incident with one EmergencyAlert; a new incident within
+# FALL_ALERT_SUPPRESS_SECONDS of the last notified one does not call again
+FALL_INCIDENT_QUIET_SECONDS = 30.0
+FALL_ALERT_SUPPRESS_SECONDS = 300.0